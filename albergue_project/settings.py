@@ -1,3 +1,5 @@
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -29,6 +31,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'gestion.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -38,6 +41,28 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Instrumentación de rendimiento (opcional): consultas, tiempo de SQL y de
+# plantillas por vista, encabezado Server-Timing y `manage.py perf_report`.
+if os.environ.get('PERF_INSTRUMENTACION') == '1':
+    MIDDLEWARE.insert(0, 'gestion.middleware.InstrumentacionMiddleware')
+
+# Muestras por vista que se conservan para los percentiles.
+PERF_MUESTRAS = 1000
+
+# Máximo de consultas por petición, por nombre de URL. Al superarlo se
+# registra un aviso en el logger "gestion.perf".
+# Los listados con GET condicional suman la consulta del ETag (la página,
+# con sus relaciones_etag).
+PERF_PRESUPUESTO_CONSULTAS = {
+    'index': 7,
+    'habitacion_list': 4,
+    'reserva_list': 4,
+    'recurso_list': 4,
+    'clima_list': 4,
+    'movimiento_recurso_list': 4,
+    'ocupacion': 6,
+}
+
 ROOT_URLCONF = 'albergue_project.urls'
 
 TEMPLATES = [
@@ -62,17 +87,78 @@ WSGI_APPLICATION = 'albergue_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
+# Cada parámetro puede venir de una variable de entorno DB_*.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'albergue_db',  # <-- Reemplaza con el nombre de tu BD
-        'USER': 'admin',   # <-- Reemplaza con tu usuario de BD
-        'PASSWORD': 'adminpass', # <-- Reemplaza con tu contraseña
-        'HOST': 'localhost',       # <-- O la IP de tu servidor de BD
-        'PORT': '5432',            # <-- El puerto de PostgreSQL
+        'NAME': os.environ.get('DB_NAME', 'albergue_db'),  # <-- Reemplaza con el nombre de tu BD
+        'USER': os.environ.get('DB_USER', 'admin'),   # <-- Reemplaza con tu usuario de BD
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'adminpass'), # <-- Reemplaza con tu contraseña
+        'HOST': os.environ.get('DB_HOST', 'localhost'),       # <-- O la IP de tu servidor de BD
+        'PORT': os.environ.get('DB_PORT', '5432'),            # <-- El puerto de PostgreSQL
+    }
+}
+
+# Réplica de solo lectura (opcional). Con DB_REPLICA_HOST definido, los
+# listados, el dashboard y las exportaciones leen de ella; sin réplica todo
+# va a 'default'. Ver gestion/routers.py.
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_ROUTERS = ['gestion.routers.ReplicaRouter']
+
+# Segundos que un navegador sigue leyendo de la primaria después de escribir
+# (cubre el retraso de replicación en la redirección posterior).
+REPLICA_RETRASO_MAXIMO = 5
+
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# CACHE_BACKEND: 'locmem' (por defecto, un proceso), 'file' o 'db' (varios workers).
+# Con 'db' hay que crear la tabla una vez: python manage.py createcachetable
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'albergue',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'albergue_cache')
+        ),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'albergue_cache'),
+    },
 }
 
+CACHES = {
+    'default': CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'locmem')],
+}
+
+# Segundos que duran los contadores del dashboard si ninguna señal los invalida antes.
+DASHBOARD_CACHE_TIMEOUT = 60 * 60
+# Los indicadores (ocupación, ingresos, etc.) solo se cachean por poco tiempo.
+DASHBOARD_INDICADORES_TIMEOUT = 60
+# Segundos que dura un fragmento de listado cacheado ({% cache %}). Las señales
+# cambian su versión al editar el modelo; el timeout además acota cuánto
+# podría durar un fragmento renderizado desde una réplica atrasada.
+FRAGMENTOS_CACHE_TIMEOUT = 5 * 60
+# Horas sin cambios tras las que `manage.py expirar_reservas` cancela una
+# reserva pendiente y libera la habitación.
+RESERVAS_PENDIENTES_HORAS = int(os.environ.get('RESERVAS_PENDIENTES_HORAS', 48))
+# Segundos que se guarda la respuesta de un POST con clave de idempotencia;
+# `manage.py purgar_idempotencia` borra las más antiguas.
+IDEMPOTENCIA_TTL = 24 * 60 * 60
+# Los recursos con menos unidades que este valor aparecen como alerta en el dashboard.
+STOCK_MINIMO_ALERTA = 10
+
 # Custom User Model
 AUTH_USER_MODEL = 'gestion.Usuario'
 
@@ -116,6 +202,10 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Bootstrap y bootstrap-icons desde static/vendor/ en lugar del CDN
+# (manage.py descargar_estaticos). En desarrollo se usa el CDN.
+ESTATICOS_LOCALES = os.environ.get('ESTATICOS_LOCALES') == '1'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
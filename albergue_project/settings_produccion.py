@@ -0,0 +1,92 @@
+"""
+Perfil de producción. Se activa con
+DJANGO_SETTINGS_MODULE=albergue_project.settings_produccion y toma todo de
+settings.py, cambiando solo lo que hace falta para servir tráfico real.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES, MIDDLEWARE, TEMPLATES
+
+
+def _entero(nombre, defecto):
+    return int(os.environ.get(nombre, defecto))
+
+
+def _activo(nombre, defecto='0'):
+    return os.environ.get(nombre, defecto) == '1'
+
+
+# DEBUG guarda en memoria cada consulta SQL y muestra trazas a cualquiera.
+DEBUG = _activo('DJANGO_DEBUG')
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost').split(',')
+
+
+# ================ PLANTILLAS ================
+# Cada plantilla se compila una vez por proceso y queda en memoria.
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    (
+        'django.template.loaders.cached.Loader',
+        [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ],
+    ),
+]
+
+
+# ================ ARCHIVOS ESTÁTICOS ================
+# `manage.py collectstatic` copia todo a STATIC_ROOT con el hash del contenido
+# en el nombre (styles.3f2a....css), así que se pueden cachear para siempre.
+# Con STATIC_WHITENOISE=1 (por defecto) los sirve WhiteNoise
+# (pip install "whitenoise[brotli]") comprimidos en gzip y brotli y con
+# Cache-Control de un año para los archivos con hash. Con STATIC_WHITENOISE=0
+# los sirve el servidor web desde STATIC_ROOT.
+STATIC_ROOT = os.environ.get('STATIC_ROOT', BASE_DIR / 'staticfiles')
+ESTATICOS_LOCALES = _activo('ESTATICOS_LOCALES', '1')
+
+if _activo('STATIC_WHITENOISE', '1'):
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+        'whitenoise.middleware.WhiteNoiseMiddleware',
+    )
+    ALMACEN_ESTATICOS = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+else:
+    ALMACEN_ESTATICOS = 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': ALMACEN_ESTATICOS},
+}
+
+
+# ================ CONEXIONES A LA BASE DE DATOS ================
+# Abrir una conexión (TCP + autenticación) cuesta más que las páginas simples,
+# así que no se abre una por petición. Hay tres modos:
+#
+# - Por defecto, conexiones persistentes: cada worker reutiliza la suya
+#   durante DB_CONN_MAX_AGE segundos y comprueba que siga viva antes de usarla.
+# - DB_POOL=1: pool de psycopg 3 (pip install "psycopg[pool]") compartido por
+#   los hilos de cada proceso. Django exige CONN_MAX_AGE = 0 con el pool.
+# - DB_PGBOUNCER=1: detrás de PgBouncer en modo transacción. Los cursores del
+#   servidor no sobreviven entre transacciones, así que se desactivan; los
+#   .iterator() de exportaciones y comandos leen entonces todo el resultado
+#   de una vez en el cliente.
+
+DB_POOL = _activo('DB_POOL')
+DB_PGBOUNCER = _activo('DB_PGBOUNCER')
+
+for base_de_datos in DATABASES.values():
+    base_de_datos['CONN_HEALTH_CHECKS'] = True
+    base_de_datos['CONN_MAX_AGE'] = 0 if DB_POOL else _entero('DB_CONN_MAX_AGE', 600)
+    base_de_datos['DISABLE_SERVER_SIDE_CURSORS'] = DB_PGBOUNCER
+    opciones = base_de_datos.setdefault('OPTIONS', {})
+    opciones['connect_timeout'] = _entero('DB_CONNECT_TIMEOUT', 5)
+    if DB_POOL:
+        opciones['pool'] = {
+            'min_size': _entero('DB_POOL_MIN', 2),
+            'max_size': _entero('DB_POOL_MAX', 10),
+            'timeout': _entero('DB_POOL_TIMEOUT', 10),
+        }
@@ -7,10 +7,18 @@ from .models import (
     Recurso,
     MovimientoRecurso
 )
+from .services import guardar_reserva
+
+
+class ReservaAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        # Con la habitación bloqueada, igual que las reservas desde el sitio.
+        guardar_reserva(obj)
+
 
 admin.site.register(Usuario)
 admin.site.register(Habitacion)
-admin.site.register(Reserva)
+admin.site.register(Reserva, ReservaAdmin)
 admin.site.register(Clima)
 admin.site.register(Recurso)
 admin.site.register(MovimientoRecurso)
\ No newline at end of file
@@ -0,0 +1,223 @@
+"""
+API JSON para la app de recepción: listado, detalle y alta de habitaciones,
+reservas, recursos, movimientos y clima.
+
+Usa la misma sesión que el sitio (las peticiones POST necesitan además el
+encabezado X-CSRFToken) y las mismas reglas de rol que AdminRequiredMixin.
+Las filas salen de values(), sin instanciar modelos ni renderizar plantillas.
+
+- GET /api/<recurso>/?campos=a,b&despues=<cursor>: página de resultados y
+  cursores "siguiente" / "anterior" para pedir la página contigua.
+- GET /api/<recurso>/<pk>/: una fila.
+- POST /api/<recurso>/: alta validada con el formulario del sitio. El cuerpo
+  puede ser JSON o un formulario codificado. Con el encabezado
+  Idempotency-Key un reintento devuelve la respuesta del primer envío.
+"""
+
+import json
+
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.views.generic import View
+from django.views.generic.list import MultipleObjectMixin
+
+from .forms import (
+    HabitacionForm,
+    ReservaClienteForm,
+    RecursoForm,
+    MovimientoRecursoForm,
+    ClimaForm,
+)
+from .mixins import (
+    IdempotenciaMixin,
+    PaginacionCursorMixin,
+    PaginaCursor,
+    es_administrador,
+)
+from .models import Habitacion, Reserva, Recurso, MovimientoRecurso, Clima
+from .routers import lecturas_en_replica
+from .services import guardar_reserva
+
+
+def _error(mensaje, status):
+    return JsonResponse({"errores": {"__all__": [mensaje]}}, status=status)
+
+
+class ApiView(IdempotenciaMixin, PaginacionCursorMixin, MultipleObjectMixin, View):
+    """
+    Base de los endpoints. Cada subclase define `model`, `form_class`,
+    `ordering` y `campos` (los que se pueden pedir con ?campos=; por defecto
+    se devuelven todos). Con `solo_admin` solo los administradores pueden
+    leer; con `alta_admin` solo ellos pueden crear.
+    """
+
+    form_class = None
+    campos = ()
+    solo_admin = False
+    alta_admin = True
+    http_method_names = ["get", "post", "head", "options"]
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return _error("Hay que iniciar sesión.", 401)
+        requiere_admin = self.solo_admin or (request.method == "POST" and self.alta_admin)
+        if requiere_admin and not es_administrador(request.user):
+            return _error("Solo para administradores.", 403)
+
+        if request.method in ("GET", "HEAD"):
+            with lecturas_en_replica():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    def campos_pedidos(self):
+        """Campos de ?campos=; lanza ValueError si alguno no está permitido."""
+        pedidos = self.request.GET.get("campos")
+        if not pedidos:
+            return list(self.campos)
+        campos = [campo.strip() for campo in pedidos.split(",") if campo.strip()]
+        invalidos = [campo for campo in campos if campo not in self.campos]
+        if invalidos:
+            raise ValueError(
+                f"Campos no disponibles: {', '.join(invalidos)}. "
+                f"Se puede pedir: {', '.join(self.campos)}."
+            )
+        return campos
+
+    def get(self, request, pk=None):
+        try:
+            campos = self.campos_pedidos()
+        except ValueError as e:
+            return _error(str(e), 400)
+
+        if pk is not None:
+            fila = self.get_queryset().filter(pk=pk).values(*campos).first()
+            if fila is None:
+                return _error("No encontrado.", 404)
+            return JsonResponse(fila)
+
+        # La página necesita el campo de orden y la pk para armar los cursores.
+        campo, _ = self._campo_orden()
+        extra = [c for c in (campo, "pk") if c not in campos]
+        pagina = PaginaCursor(self, self.get_queryset().values(*campos, *extra))
+        resultados = list(pagina)
+        for fila in resultados:
+            for c in extra:
+                del fila[c]
+        return JsonResponse(
+            {
+                "resultados": resultados,
+                "siguiente": pagina.cursor_siguiente(),
+                "anterior": pagina.cursor_anterior(),
+            }
+        )
+
+    def guardar(self, form, datos):
+        """Guarda el formulario ya validado y devuelve el objeto creado."""
+        return form.save()
+
+    def post(self, request, pk=None):
+        if pk is not None:
+            return self.http_method_not_allowed(request)
+        if request.content_type == "application/json":
+            try:
+                datos = json.loads(request.body)
+            except ValueError:
+                datos = None
+            if not isinstance(datos, dict):
+                return _error("El cuerpo debe ser un objeto JSON.", 400)
+        else:
+            datos = request.POST.dict()
+
+        # Los campos omitidos toman el valor por defecto del modelo, como en
+        # el formulario HTML que ya viene con ellos completos.
+        iniciales = {
+            nombre: campo.initial() if callable(campo.initial) else campo.initial
+            for nombre, campo in self.form_class().fields.items()
+            if campo.initial is not None
+        }
+        form = self.form_class(data={**iniciales, **datos})
+        if not form.is_valid():
+            return JsonResponse({"errores": form.errors}, status=400)
+        try:
+            objeto = self.guardar(form, datos)
+        except ValidationError as e:
+            errores = e.message_dict if hasattr(e, "error_dict") else {"__all__": e.messages}
+            return JsonResponse({"errores": errores}, status=400)
+
+        fila = self.model.objects.filter(pk=objeto.pk).values(*self.campos).first()
+        return JsonResponse(fila, status=201)
+
+
+class HabitacionApiView(ApiView):
+    model = Habitacion
+    form_class = HabitacionForm
+    ordering = ["numero"]
+    campos = ("id", "numero", "tipo", "capacidad", "precio", "estado", "actualizado")
+
+
+class ReservaApiView(ApiView):
+    """
+    Los clientes ven solo sus reservas y pueden crear reservas pendientes
+    a su nombre, igual que en ReservaClienteCreateView.
+    """
+
+    model = Reserva
+    form_class = ReservaClienteForm
+    ordering = ["-fecha_inicio"]
+    alta_admin = False
+    campos = (
+        "id",
+        "usuario",
+        "usuario__username",
+        "habitacion",
+        "habitacion__numero",
+        "fecha_inicio",
+        "fecha_fin",
+        "estado",
+        "actualizado",
+    )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not es_administrador(self.request.user):
+            queryset = queryset.filter(usuario=self.request.user)
+        return queryset
+
+    def guardar(self, form, datos):
+        form.instance.usuario = self.request.user
+        form.instance.estado = "pendiente"
+        try:
+            form.instance.habitacion_id = int(datos.get("habitacion"))
+            return guardar_reserva(form.instance)
+        except (TypeError, ValueError, Habitacion.DoesNotExist):
+            raise ValidationError({"habitacion": ["Indica una habitación existente."]})
+
+
+class RecursoApiView(ApiView):
+    model = Recurso
+    form_class = RecursoForm
+    ordering = ["nombre"]
+    solo_admin = True
+    campos = ("id", "nombre", "tipo", "cantidad_total", "unidad", "actualizado")
+
+
+class MovimientoRecursoApiView(ApiView):
+    model = MovimientoRecurso
+    form_class = MovimientoRecursoForm
+    ordering = ["-fecha"]
+    solo_admin = True
+    campos = ("id", "recurso", "recurso__nombre", "cantidad", "fecha", "motivo")
+
+
+class ClimaApiView(ApiView):
+    model = Clima
+    form_class = ClimaForm
+    ordering = ["-fecha"]
+    campos = (
+        "id",
+        "fecha",
+        "temperatura",
+        "probabilidad_lluvia",
+        "comentarios",
+        "actualizado",
+    )
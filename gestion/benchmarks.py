@@ -0,0 +1,211 @@
+"""
+Benchmarks de las rutas críticas de reservas e inventario.
+Se ejecutan con `manage.py benchmark`; cada tamaño de datos se genera y se
+revierte dentro de una transacción, así que la base de datos queda intacta.
+"""
+
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from .dashboard import CLAVE_CONTADORES, CLAVE_INDICADORES
+from .models import (
+    Usuario,
+    Habitacion,
+    Reserva,
+    Recurso,
+    MovimientoRecurso,
+    Clima,
+    OcupacionNoche,
+)
+
+# Lejos de cualquier dato real para no chocar con restricciones únicas (Clima.fecha).
+FECHA_BASE = date(1900, 1, 1)
+PASSWORD = "benchmark-pass"
+
+
+class Escenario:
+    """Datos generados para un tamaño: N reservas y N movimientos."""
+
+    def __init__(self, tamano, semilla=42):
+        rng = random.Random(semilla)
+        self.admin = Usuario.objects.create_user(
+            username="bench_admin",
+            email="bench_admin@example.com",
+            password=PASSWORD,
+            rol="administrador",
+        )
+        clientes = Usuario.objects.bulk_create(
+            Usuario(username=f"bench_{i}", email=f"bench_{i}@example.com")
+            for i in range(20)
+        )
+        self.habitaciones = Habitacion.objects.bulk_create(
+            Habitacion(
+                numero=f"B{i:05d}", tipo="doble", capacidad=2, precio=80
+            )
+            for i in range(max(5, tamano // 100))
+        )
+
+        # Reservas consecutivas por habitación, sin solapamientos.
+        self.proxima_fecha = {}
+        reservas = []
+        for i in range(tamano):
+            habitacion = self.habitaciones[i % len(self.habitaciones)]
+            inicio = self.proxima_fecha.get(habitacion.pk, FECHA_BASE)
+            fin = inicio + timedelta(days=rng.randint(1, 5))
+            reservas.append(
+                Reserva(
+                    usuario=rng.choice(clientes),
+                    habitacion=habitacion,
+                    fecha_inicio=inicio,
+                    fecha_fin=fin,
+                    estado=rng.choice(["pendiente", "confirmada", "confirmada"]),
+                )
+            )
+            self.proxima_fecha[habitacion.pk] = fin
+        Reserva.objects.bulk_create(reservas, batch_size=5000)
+        OcupacionNoche.objects.bulk_create(
+            (noche for reserva in reservas for noche in OcupacionNoche.noches_de(reserva)),
+            batch_size=5000,
+        )
+
+        self.recursos = Recurso.objects.bulk_create(
+            Recurso(nombre=f"Recurso {i}", tipo="consumible", cantidad_total=0, unidad="u")
+            for i in range(20)
+        )
+        MovimientoRecurso.objects.bulk_create(
+            (
+                MovimientoRecurso(
+                    recurso=rng.choice(self.recursos), cantidad=1, motivo="Benchmark"
+                )
+                for _ in range(tamano)
+            ),
+            batch_size=5000,
+        )
+        Clima.objects.bulk_create(
+            Clima(
+                fecha=FECHA_BASE + timedelta(days=i),
+                temperatura=20,
+                probabilidad_lluvia=10,
+            )
+            for i in range(min(tamano, 3650))
+        )
+
+        self.cliente_http = Client()
+        self.cliente_http.force_login(self.admin)
+        self.rng = rng
+
+
+def caso_reserva_save(escenario):
+    """Reserva.save(): validación de solapamiento e inserción con su calendario."""
+    habitacion = escenario.rng.choice(escenario.habitaciones)
+    inicio = escenario.proxima_fecha[habitacion.pk]
+    escenario.proxima_fecha[habitacion.pk] = inicio + timedelta(days=2)
+    Reserva(
+        usuario=escenario.admin,
+        habitacion=habitacion,
+        fecha_inicio=inicio,
+        fecha_fin=inicio + timedelta(days=2),
+        estado="confirmada",
+    ).save()
+
+
+def caso_reserva_list(escenario):
+    """Render completo de ReservaListView como administrador."""
+    respuesta = escenario.cliente_http.get(reverse("reserva_list"))
+    assert respuesta.status_code == 200
+
+
+def caso_movimiento_create(escenario):
+    """Alta de un MovimientoRecurso con su ajuste de stock."""
+    MovimientoRecurso.objects.create(
+        recurso=escenario.rng.choice(escenario.recursos), cantidad=-1, motivo="Benchmark"
+    )
+
+
+def caso_index(escenario):
+    """Dashboard sin caché: contadores e indicadores calculados en la base de datos."""
+    cache.delete_many([CLAVE_CONTADORES, CLAVE_INDICADORES])
+    respuesta = escenario.cliente_http.get(reverse("index"))
+    assert respuesta.status_code == 200
+
+
+def caso_login(escenario):
+    """POST de login con credenciales válidas (incluye el hash de la contraseña)."""
+    cliente = Client()
+    respuesta = cliente.post(
+        reverse("login"), {"username": "bench_admin", "password": PASSWORD}
+    )
+    assert respuesta.status_code == 302
+
+
+CASOS = {
+    "reserva_save": caso_reserva_save,
+    "reserva_list": caso_reserva_list,
+    "movimiento_create": caso_movimiento_create,
+    "index": caso_index,
+    "login": caso_login,
+}
+
+
+def _resumen(tiempos):
+    tiempos = sorted(tiempos)
+    return {
+        "p50": round(statistics.median(tiempos), 3),
+        "p95": round(tiempos[max(0, int(len(tiempos) * 0.95) - 1)], 3),
+        "media": round(statistics.fmean(tiempos), 3),
+    }
+
+
+def ejecutar(tamanos, repeticiones, casos=None, calentamiento=3, informar=None):
+    """
+    Ejecuta los casos para cada tamaño y devuelve
+    {caso: {tamano: {"p50", "p95", "media"}}} con tiempos en milisegundos.
+    """
+    setup_test_environment()
+    casos = casos or list(CASOS)
+    resultados = {caso: {} for caso in casos}
+
+    for tamano in tamanos:
+        with transaction.atomic():
+            escenario = Escenario(tamano)
+            for caso in casos:
+                funcion = CASOS[caso]
+                for _ in range(calentamiento):
+                    funcion(escenario)
+                tiempos = []
+                for _ in range(repeticiones):
+                    inicio = time.perf_counter()
+                    funcion(escenario)
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                resultados[caso][str(tamano)] = _resumen(tiempos)
+                if informar:
+                    informar(caso, tamano, resultados[caso][str(tamano)])
+            transaction.set_rollback(True)
+        cache.delete_many([CLAVE_CONTADORES, CLAVE_INDICADORES])
+
+    return resultados
+
+
+def comparar(actual, base, umbral):
+    """
+    Compara la mediana de cada caso y tamaño con una ejecución anterior.
+    Devuelve la lista de (caso, tamano, p50_base, p50_actual, cociente) y
+    la de regresiones, es decir las que superan el umbral.
+    """
+    filas = []
+    for caso, por_tamano in actual.items():
+        for tamano, datos in por_tamano.items():
+            anterior = base.get(caso, {}).get(tamano)
+            if anterior and anterior["p50"]:
+                cociente = datos["p50"] / anterior["p50"]
+                filas.append((caso, tamano, anterior["p50"], datos["p50"], cociente))
+    regresiones = [fila for fila in filas if fila[4] > umbral]
+    return filas, regresiones
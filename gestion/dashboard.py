@@ -0,0 +1,136 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Avg, Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import Habitacion, Reserva, Recurso, OcupacionNoche
+
+CLAVE_CONTADORES = "dashboard:contadores"
+CLAVE_INDICADORES = "dashboard:indicadores"
+
+CONTADORES = (
+    ("num_habitaciones", Habitacion),
+    ("num_reservas", Reserva),
+    ("num_recursos", Recurso),
+)
+
+
+def _contar():
+    """Cuenta las filas de todas las tablas del dashboard en una sola consulta."""
+    subconsultas = ", ".join(
+        f"(SELECT COUNT(*) FROM {connection.ops.quote_name(modelo._meta.db_table)})"
+        for _, modelo in CONTADORES
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {subconsultas}")
+        fila = cursor.fetchone()
+    return {nombre: valor for (nombre, _), valor in zip(CONTADORES, fila)}
+
+
+def contadores():
+    """
+    Contadores del dashboard desde la caché. Solo se consultan en la base de
+    datos cuando la caché está vacía; las señales de gestion/signals.py la
+    invalidan cuando cambia alguno de los modelos contados.
+    Se cuentan siempre en la primaria: duran una hora en caché y una réplica
+    atrasada dejaría guardado un valor viejo justo después de invalidarlos.
+    """
+    return cache.get_or_set(
+        CLAVE_CONTADORES, _contar, settings.DASHBOARD_CACHE_TIMEOUT
+    )
+
+
+def invalidar_contadores():
+    cache.delete(CLAVE_CONTADORES)
+
+
+def _reservas_por_estado():
+    conteos = Reserva.objects.aggregate(
+        **{
+            estado: Count("id", filter=Q(estado=estado))
+            for estado, _ in Reserva.ESTADO_CHOICES
+        }
+    )
+    return [
+        {"estado": estado, "nombre": nombre, "total": conteos[estado]}
+        for estado, nombre in Reserva.ESTADO_CHOICES
+    ]
+
+
+def _ocupacion(hoy, total_habitaciones, dias=30):
+    """Porcentaje de habitaciones ocupadas hoy y promedio de los próximos `dias`."""
+    noches = OcupacionNoche.objects.aggregate(
+        hoy=Count("id", filter=Q(fecha=hoy)),
+        proximas=Count(
+            "id", filter=Q(fecha__gte=hoy, fecha__lt=hoy + timedelta(days=dias))
+        ),
+    )
+    if not total_habitaciones:
+        return {"hoy": 0, "proximos_dias": 0, "dias": dias}
+    return {
+        "hoy": round(100 * noches["hoy"] / total_habitaciones, 1),
+        "proximos_dias": round(
+            100 * noches["proximas"] / (total_habitaciones * dias), 1
+        ),
+        "dias": dias,
+    }
+
+
+def _ingresos_por_mes(hoy, meses_atras=5, meses_adelante=6):
+    """
+    Ingresos de reservas confirmadas por mes: cada noche ocupada aporta el
+    precio de su habitación, así que la suma equivale a precio × noches.
+    """
+    desde = date(hoy.year, hoy.month, 1)
+    for _ in range(meses_atras):
+        desde = (desde - timedelta(days=1)).replace(day=1)
+    hasta = date(hoy.year, hoy.month, 1)
+    for _ in range(meses_adelante + 1):
+        hasta = (hasta + timedelta(days=32)).replace(day=1)
+
+    return list(
+        OcupacionNoche.objects.filter(
+            reserva__estado="confirmada", fecha__gte=desde, fecha__lt=hasta
+        )
+        .annotate(mes=TruncMonth("fecha"))
+        .values("mes")
+        .annotate(
+            ingresos=Sum("habitacion__precio"),
+            noches=Count("id"),
+            tarifa_media=Avg("habitacion__precio"),
+        )
+        .order_by("mes")
+    )
+
+
+def _stock_bajo():
+    return list(
+        Recurso.objects.filter(cantidad_total__lt=settings.STOCK_MINIMO_ALERTA)
+        .order_by("cantidad_total", "nombre")
+        .values("pk", "nombre", "cantidad_total", "unidad")
+    )
+
+
+def indicadores():
+    """
+    Indicadores de gestión del dashboard: ocupación, ingresos por mes,
+    reservas por estado y recursos con stock bajo. Cada bloque es una sola
+    consulta agregada en la base de datos; el resultado se guarda en caché
+    por poco tiempo (DASHBOARD_INDICADORES_TIMEOUT) porque cambia con cada reserva.
+    """
+
+    def calcular():
+        hoy = date.today()
+        return {
+            "reservas_por_estado": _reservas_por_estado(),
+            "ocupacion": _ocupacion(hoy, contadores()["num_habitaciones"]),
+            "ingresos_por_mes": _ingresos_por_mes(hoy),
+            "stock_bajo": _stock_bajo(),
+        }
+
+    return cache.get_or_set(
+        CLAVE_INDICADORES, calcular, settings.DASHBOARD_INDICADORES_TIMEOUT
+    )
@@ -39,6 +39,12 @@ class RecursoForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         for field in self.fields.values():
             field.widget.attrs["class"] = "form-control"
+        if self.instance.pk:
+            # Una vez creado, el stock solo cambia registrando movimientos.
+            self.fields["cantidad_total"].disabled = True
+            self.fields["cantidad_total"].help_text = (
+                "Para modificar el stock registra un movimiento."
+            )
 
 
 class MovimientoRecursoForm(forms.ModelForm):
@@ -134,3 +140,118 @@ class ReservaClienteForm(forms.ModelForm):
                 attrs={"type": "date", "class": "form-control"}
             ),
         }
+
+
+class ReservaGrupoForm(forms.Form):
+    """
+    Reserva de varias habitaciones para las mismas fechas (grupos).
+    Las habitaciones en mantenimiento no se ofrecen; el solapamiento se
+    comprueba en services.reservar_grupo con las habitaciones bloqueadas.
+    """
+
+    MAXIMO_HABITACIONES = 20
+
+    fecha_inicio = forms.DateField(
+        label="Fecha de inicio",
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+    )
+    fecha_fin = forms.DateField(
+        label="Fecha de fin",
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+    )
+    habitaciones = forms.ModelMultipleChoiceField(
+        label="Habitaciones",
+        queryset=Habitacion.objects.exclude(estado="mantenimiento").order_by("numero"),
+        widget=forms.CheckboxSelectMultiple(attrs={"class": "form-check-input"}),
+    )
+
+    def clean_habitaciones(self):
+        habitaciones = self.cleaned_data["habitaciones"]
+        if len(habitaciones) > self.MAXIMO_HABITACIONES:
+            raise forms.ValidationError(
+                f"Se pueden reservar hasta {self.MAXIMO_HABITACIONES} habitaciones a la vez."
+            )
+        return habitaciones
+
+    def clean(self):
+        cleaned_data = super().clean()
+        fecha_inicio = cleaned_data.get("fecha_inicio")
+        fecha_fin = cleaned_data.get("fecha_fin")
+        if fecha_inicio and fecha_fin and fecha_inicio >= fecha_fin:
+            raise forms.ValidationError(
+                "La fecha de fin debe ser posterior a la fecha de inicio."
+            )
+        return cleaned_data
+
+
+class DisponibilidadForm(forms.Form):
+    """
+    Criterios de búsqueda de habitaciones libres para un rango de fechas.
+    """
+
+    fecha_inicio = forms.DateField(
+        label="Fecha de inicio",
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+    )
+    fecha_fin = forms.DateField(
+        label="Fecha de fin",
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+    )
+    capacidad = forms.IntegerField(
+        label="Capacidad mínima",
+        min_value=1,
+        required=False,
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+    )
+    tipo = forms.ChoiceField(
+        label="Tipo",
+        choices=(("", "Cualquiera"),) + Habitacion.TIPO_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        fecha_inicio = cleaned_data.get("fecha_inicio")
+        fecha_fin = cleaned_data.get("fecha_fin")
+        if fecha_inicio and fecha_fin and fecha_inicio >= fecha_fin:
+            raise forms.ValidationError(
+                "La fecha de fin debe ser posterior a la fecha de inicio."
+            )
+        return cleaned_data
+
+    def buscar(self):
+        """Devuelve el queryset de habitaciones libres que cumplen los criterios."""
+        datos = self.cleaned_data
+        habitaciones = Habitacion.objects.disponibles(
+            datos["fecha_inicio"], datos["fecha_fin"]
+        )
+        if datos.get("capacidad"):
+            habitaciones = habitaciones.filter(capacidad__gte=datos["capacidad"])
+        if datos.get("tipo"):
+            habitaciones = habitaciones.filter(tipo=datos["tipo"])
+        return habitaciones.order_by("numero")
+
+
+class CalendarioOcupacionForm(forms.Form):
+    """
+    Rango de noches a mostrar en el calendario de ocupación.
+    """
+
+    desde = forms.DateField(
+        label="Desde",
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+    )
+    dias = forms.IntegerField(
+        label="Días",
+        min_value=1,
+        max_value=366,
+        required=False,
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+    )
+    fecha = forms.DateField(
+        label="Detalle de la noche",
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+    )
@@ -0,0 +1,42 @@
+"""
+Versiones por modelo para la caché de fragmentos de plantilla.
+
+Cada modelo versionado tiene un número en la caché que forma parte de la
+clave de sus fragmentos ({% cache ... version_fragmento %}). Las señales de
+gestion/signals.py lo incrementan al guardar o borrar una fila, de modo que
+los fragmentos viejos dejan de usarse sin tener que buscarlos y expiran solos.
+"""
+
+import time
+
+from django.core.cache import cache
+
+from .models import Habitacion, Clima
+
+# Modelos cuyos listados se cachean como fragmentos.
+MODELOS_VERSIONADOS = (Habitacion, Clima)
+
+
+def _clave(modelo):
+    return f"fragmentos:version:{modelo._meta.label_lower}"
+
+
+def _version_inicial():
+    # Si la caché se vacía, la nueva versión no repite una anterior.
+    return time.time_ns()
+
+
+def version(modelo):
+    return cache.get_or_set(_clave(modelo), _version_inicial, None)
+
+
+def incrementar_version(*modelos):
+    """
+    Invalida los fragmentos de los modelos dados. Hay que llamarla a mano
+    tras operaciones que no envían señales (bulk_create, update, TRUNCATE).
+    """
+    for modelo in modelos or MODELOS_VERSIONADOS:
+        try:
+            cache.incr(_clave(modelo))
+        except ValueError:
+            cache.set(_clave(modelo), _version_inicial(), None)
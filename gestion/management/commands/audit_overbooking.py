@@ -0,0 +1,109 @@
+import csv
+import heapq
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from gestion.models import Reserva
+
+COLUMNAS = [
+    "habitacion",
+    "reserva_a",
+    "inicio_a",
+    "fin_a",
+    "estado_a",
+    "reserva_b",
+    "inicio_b",
+    "fin_b",
+    "estado_b",
+    "noches_solapadas",
+]
+
+
+def pares_solapados(filas):
+    """
+    Recorre filas (pk, habitacion, numero, inicio, fin, estado) ordenadas por
+    (habitacion, inicio) y genera cada par de reservas de la misma habitación
+    cuyos intervalos [inicio, fin) se cruzan.
+
+    Barrido: por habitación se mantiene un montículo con las reservas todavía
+    abiertas, ordenadas por fecha de fin. Al llegar una reserva se descartan
+    las que terminaron antes de su inicio; todas las que quedan se solapan
+    con ella. Cada reserva entra y sale del montículo una vez, así que el
+    costo es O(n log n) más los pares encontrados, y la memoria depende de
+    cuántas reservas se superponen a la vez, no del total.
+    """
+    habitacion_actual = None
+    abiertas = []
+    for fila in filas:
+        _, habitacion, _, inicio, fin, _ = fila
+        if habitacion != habitacion_actual:
+            habitacion_actual, abiertas = habitacion, []
+        while abiertas and abiertas[0][0] <= inicio:
+            heapq.heappop(abiertas)
+        for _, _, otra in abiertas:
+            yield otra, fila
+        # El pk desempata: las filas no se comparan entre sí.
+        heapq.heappush(abiertas, (fin, fila[0], fila))
+
+
+class Command(BaseCommand):
+    help = (
+        "Busca reservas activas solapadas en la misma habitación y escribe un "
+        "informe CSV con cada par. Lee las reservas en streaming, ordenadas por "
+        "habitación y fecha de inicio, con memoria acotada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--salida",
+            help="Archivo CSV de destino (por defecto, la salida estándar).",
+        )
+        parser.add_argument(
+            "--desde",
+            type=date.fromisoformat,
+            help="Solo reservas que terminan después de esta fecha (AAAA-MM-DD).",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=5000,
+            help="Filas leídas por viaje al servidor.",
+        )
+
+    def handle(self, *args, **options):
+        reservas = Reserva.objects.activas()
+        if options["desde"]:
+            reservas = reservas.filter(fecha_fin__gt=options["desde"])
+        filas = (
+            reservas.order_by("habitacion_id", "fecha_inicio", "pk")
+            .values_list(
+                "pk", "habitacion_id", "habitacion__numero", "fecha_inicio", "fecha_fin", "estado"
+            )
+            .iterator(chunk_size=options["lote"])
+        )
+
+        archivo = (
+            open(options["salida"], "w", newline="", encoding="utf-8")
+            if options["salida"]
+            else self.stdout
+        )
+        pares = 0
+        habitaciones = set()
+        try:
+            escritor = csv.writer(archivo)
+            escritor.writerow(COLUMNAS)
+            for a, b in pares_solapados(filas):
+                noches = (min(a[4], b[4]) - max(a[3], b[3])).days
+                escritor.writerow([a[2], a[0], a[3], a[4], a[5], b[0], b[3], b[4], b[5], noches])
+                pares += 1
+                habitaciones.add(a[1])
+        finally:
+            if archivo is not self.stdout:
+                archivo.close()
+
+        # El resumen va a stderr para no mezclarse con el CSV en stdout.
+        estilo = self.style.WARNING if pares else self.style.SUCCESS
+        self.stderr.write(
+            estilo(f"Pares solapados: {pares} en {len(habitaciones)} habitaciones."),
+        )
@@ -0,0 +1,102 @@
+import json
+import platform
+import subprocess
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from gestion.benchmarks import CASOS, ejecutar, comparar
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide las rutas críticas (Reserva.save, listado de reservas, alta de "
+        "movimientos, dashboard y login) con varios tamaños de datos y guarda "
+        "los resultados en JSON para compararlos entre commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanos",
+            nargs="+",
+            type=int,
+            default=[100, 1000, 10000],
+            help="Cantidad de reservas y de movimientos de cada escenario.",
+        )
+        parser.add_argument("--repeticiones", type=int, default=30)
+        parser.add_argument(
+            "--casos",
+            nargs="+",
+            choices=list(CASOS),
+            help="Casos a ejecutar (por defecto, todos).",
+        )
+        parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados.")
+        parser.add_argument(
+            "--comparar",
+            help="JSON de una ejecución anterior; falla si alguna mediana empeora.",
+        )
+        parser.add_argument(
+            "--umbral",
+            type=float,
+            default=1.25,
+            help="Cociente p50 actual / p50 anterior a partir del cual hay regresión.",
+        )
+
+    def handle(self, *args, **options):
+        def informar(caso, tamano, datos):
+            self.stdout.write(
+                f"{caso:<20}{tamano:>8}  p50 {datos['p50']:>9.3f} ms  "
+                f"p95 {datos['p95']:>9.3f} ms"
+            )
+
+        resultados = ejecutar(
+            options["tamanos"],
+            options["repeticiones"],
+            casos=options["casos"],
+            informar=informar,
+        )
+        informe = {
+            "meta": {
+                "commit": _commit_actual(),
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "motor": connection.vendor,
+                "python": platform.python_version(),
+                "repeticiones": options["repeticiones"],
+            },
+            "resultados": resultados,
+        }
+
+        if options["salida"]:
+            with open(options["salida"], "w", encoding="utf-8") as archivo:
+                json.dump(informe, archivo, indent=2)
+            self.stdout.write(f"Resultados guardados en {options['salida']}")
+
+        if options["comparar"]:
+            with open(options["comparar"], encoding="utf-8") as archivo:
+                base = json.load(archivo)
+            filas, regresiones = comparar(
+                resultados, base["resultados"], options["umbral"]
+            )
+            self.stdout.write(f"\nComparación con {base['meta'].get('commit')}:")
+            for caso, tamano, anterior, actual, cociente in filas:
+                self.stdout.write(
+                    f"{caso:<20}{tamano:>8}  {anterior:>9.3f} -> {actual:>9.3f} ms  x{cociente:.2f}"
+                )
+            if regresiones:
+                raise CommandError(
+                    f"{len(regresiones)} mediciones empeoraron más de x{options['umbral']}."
+                )
+            self.stdout.write(self.style.SUCCESS("Sin regresiones."))
@@ -0,0 +1,108 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from gestion.models import Usuario, Habitacion, Reserva, OcupacionNoche
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia de la verificación de solapamiento de reservas "
+        "a medida que crece el número de reservas por habitación. "
+        "Todos los datos se crean dentro de una transacción que se revierte al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanos",
+            nargs="+",
+            type=int,
+            default=[10, 100, 1000, 10000, 100000],
+            help="Cantidades de reservas por habitación a probar.",
+        )
+        parser.add_argument(
+            "--repeticiones",
+            type=int,
+            default=200,
+            help="Número de verificaciones cronometradas por tamaño.",
+        )
+
+    def handle(self, *args, **options):
+        repeticiones = options["repeticiones"]
+        base = date(2000, 1, 1)
+
+        with transaction.atomic():
+            usuario = Usuario.objects.create_user(
+                username="benchmark_solapamiento",
+                email="benchmark_solapamiento@example.com",
+                password=None,
+            )
+
+            self.stdout.write(
+                f"{'reservas':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p50 futura':>14}"
+            )
+            for tamano in options["tamanos"]:
+                habitacion = Habitacion.objects.create(
+                    numero=f"B{tamano}"[:10],
+                    tipo="individual",
+                    capacidad=1,
+                    precio=0,
+                )
+                # Reservas de una noche cada dos días: nunca se solapan entre sí.
+                Reserva.objects.bulk_create(
+                    (
+                        Reserva(
+                            usuario=usuario,
+                            habitacion=habitacion,
+                            fecha_inicio=base + timedelta(days=2 * i),
+                            fecha_fin=base + timedelta(days=2 * i + 1),
+                            estado="confirmada",
+                        )
+                        for i in range(tamano)
+                    ),
+                    batch_size=5000,
+                )
+                OcupacionNoche.objects.bulk_create(
+                    (
+                        noche
+                        for reserva in Reserva.objects.filter(habitacion=habitacion)
+                        for noche in OcupacionNoche.noches_de(reserva)
+                    ),
+                    batch_size=5000,
+                )
+                fin_historial = base + timedelta(days=2 * tamano)
+
+                # Se alternan consultas libres (el hueco entre dos reservas),
+                # con choque (repartidas a lo largo de toda la línea de tiempo)
+                # y libres después del final del historial, que es el caso de
+                # una reserva nueva a futuro.
+                tiempos = []
+                futuras = []
+                for i in range(repeticiones):
+                    if i % 3 == 2:
+                        inicio = fin_historial + timedelta(days=i)
+                    else:
+                        dia = 2 * ((i * 7919) % tamano)
+                        inicio = base + timedelta(days=dia + (i % 3))
+                    fin = inicio + timedelta(days=1)
+                    t0 = time.perf_counter()
+                    Reserva.objects.hay_solapamiento(habitacion, inicio, fin)
+                    tiempo = (time.perf_counter() - t0) * 1000
+                    tiempos.append(tiempo)
+                    if i % 3 == 2:
+                        futuras.append(tiempo)
+
+                tiempos.sort()
+                p50 = statistics.median(tiempos)
+                p95 = tiempos[int(len(tiempos) * 0.95) - 1]
+                p50_futura = statistics.median(futuras) if futuras else 0
+                self.stdout.write(
+                    f"{tamano:>10} {p50:>10.3f} {p95:>10.3f} {p50_futura:>14.3f}"
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark completado (datos revertidos)."))
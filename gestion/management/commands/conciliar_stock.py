@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce, Now
+
+from gestion.models import Recurso
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el stock de cada recurso como stock_inicial más la suma de "
+        "sus movimientos e informa las diferencias con cantidad_total."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--corregir",
+            action="store_true",
+            help="Sobrescribe cantidad_total con el valor recalculado.",
+        )
+
+    def handle(self, *args, **options):
+        recursos = (
+            Recurso.objects.annotate(
+                esperado=F("stock_inicial")
+                + Coalesce(Sum("movimientorecurso__cantidad"), Value(0))
+            )
+            .exclude(cantidad_total=F("esperado"))
+            .values_list("pk", "nombre", "cantidad_total", "esperado")
+            .order_by("pk")
+        )
+
+        descuadres = 0
+        for pk, nombre, cantidad_total, esperado in recursos.iterator():
+            descuadres += 1
+            self.stdout.write(
+                f"{nombre} (id {pk}): registrado {cantidad_total}, "
+                f"según movimientos {esperado} (diferencia {cantidad_total - esperado:+d})"
+            )
+            if options["corregir"]:
+                Recurso.objects.filter(pk=pk).update(
+                    cantidad_total=F("cantidad_total") - (cantidad_total - esperado),
+                    actualizado=Now(),
+                )
+
+        if not descuadres:
+            self.stdout.write(self.style.SUCCESS("Todos los recursos están conciliados."))
+        elif options["corregir"]:
+            self.stdout.write(self.style.SUCCESS(f"{descuadres} recursos corregidos."))
+        else:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{descuadres} recursos con diferencias. Usa --corregir para ajustarlos."
+                )
+            )
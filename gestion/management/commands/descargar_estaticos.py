@@ -0,0 +1,38 @@
+from pathlib import Path
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.templatetags.estaticos import ARCHIVOS_VENDOR, CDN
+
+
+class Command(BaseCommand):
+    help = (
+        "Descarga Bootstrap y bootstrap-icons a static/vendor/ para servirlos "
+        "localmente (ESTATICOS_LOCALES=1). Después: manage.py collectstatic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--forzar",
+            action="store_true",
+            help="Vuelve a descargar los archivos que ya existen.",
+        )
+
+    def handle(self, *args, **options):
+        destino = Path(settings.STATICFILES_DIRS[0]) / "vendor"
+        for ruta in ARCHIVOS_VENDOR:
+            archivo = destino / ruta
+            if archivo.exists() and not options["forzar"]:
+                self.stdout.write(f"Ya existe: {ruta}")
+                continue
+            try:
+                with urlopen(CDN + ruta, timeout=30) as respuesta:
+                    contenido = respuesta.read()
+            except OSError as e:
+                raise CommandError(f"No se pudo descargar {ruta}: {e}")
+            archivo.parent.mkdir(parents=True, exist_ok=True)
+            archivo.write_bytes(contenido)
+            self.stdout.write(f"Descargado: {ruta} ({len(contenido)} bytes)")
+        self.stdout.write(self.style.SUCCESS(f"Archivos en {destino}"))
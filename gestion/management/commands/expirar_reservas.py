@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from gestion.services import expirar_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Cancela las reservas pendientes sin cambios desde hace más de "
+        "RESERVAS_PENDIENTES_HORAS horas y libera sus habitaciones. "
+        "Trabaja por lotes cortos para no bloquear la tabla; pensado para cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--horas",
+            type=int,
+            default=settings.RESERVAS_PENDIENTES_HORAS,
+            help="Antigüedad (horas desde la última modificación) a partir de la cual vence una pendiente.",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=500,
+            help="Reservas canceladas por transacción.",
+        )
+        parser.add_argument(
+            "--pausa",
+            type=float,
+            default=0,
+            help="Segundos de espera entre lotes.",
+        )
+        parser.add_argument(
+            "--simular",
+            action="store_true",
+            help="Solo informa cuántas reservas vencerían, sin modificar nada.",
+        )
+
+    def handle(self, *args, **options):
+        canceladas, noches, habitaciones = expirar_pendientes(
+            options["horas"],
+            tamano_lote=options["lote"],
+            pausa=options["pausa"],
+            simular=options["simular"],
+        )
+        prefijo = "Se cancelarían" if options["simular"] else "Canceladas"
+        self.stdout.write(f"{prefijo} {canceladas} reservas pendientes vencidas.")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Habitaciones liberadas: {habitaciones} ({noches} noches de ocupación)."
+            )
+        )
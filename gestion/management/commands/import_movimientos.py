@@ -0,0 +1,54 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.services import registrar_movimientos, leer_filas, LoteInvalido
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa movimientos de recursos desde un archivo CSV (recurso,cantidad,motivo) "
+        "o JSONL. El archivo se lee en streaming y la importación es todo o nada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", help="Ruta del archivo, o - para leer de stdin.")
+        parser.add_argument(
+            "--formato",
+            choices=["csv", "jsonl"],
+            help="Por defecto se deduce de la extensión del archivo.",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=1000,
+            help="Filas validadas e insertadas por lote.",
+        )
+
+    def handle(self, *args, **options):
+        ruta = options["archivo"]
+        formato = options["formato"]
+        if formato is None:
+            if ruta.endswith(".csv"):
+                formato = "csv"
+            elif ruta.endswith((".jsonl", ".ndjson")):
+                formato = "jsonl"
+            else:
+                raise CommandError("No se pudo deducir el formato; usa --formato.")
+
+        archivo = sys.stdin if ruta == "-" else open(ruta, encoding="utf-8", newline="")
+        try:
+            creados = registrar_movimientos(
+                leer_filas(archivo, formato), tamano_lote=options["lote"]
+            )
+        except LoteInvalido as e:
+            for numero, mensaje in e.errores[:50]:
+                self.stderr.write(f"Fila {numero}: {mensaje}")
+            if len(e.errores) > 50:
+                self.stderr.write(f"... y {len(e.errores) - 50} errores más.")
+            raise CommandError("No se importó ningún movimiento.")
+        finally:
+            if archivo is not sys.stdin:
+                archivo.close()
+
+        self.stdout.write(self.style.SUCCESS(f"{creados} movimientos importados."))
@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from gestion.middleware import leer_muestras, borrar_muestras, percentil
+
+
+class Command(BaseCommand):
+    help = (
+        "Muestra percentiles (p50/p95/p99) de tiempo total, tiempo de SQL y "
+        "número de consultas por vista, según las muestras del middleware de "
+        "instrumentación (PERF_INSTRUMENTACION=1)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", help="Salida en JSON.")
+        parser.add_argument(
+            "--reiniciar",
+            action="store_true",
+            help="Borra las muestras acumuladas después del informe.",
+        )
+
+    def handle(self, *args, **options):
+        informe = {}
+        for vista, (muestras, duplicadas) in sorted(leer_muestras().items()):
+            columnas = list(zip(*muestras)) if muestras else [[], [], [], []]
+            total, sql, consultas, plantilla = (sorted(c) for c in columnas)
+            informe[vista] = {
+                "peticiones": len(muestras),
+                "total_ms": {f"p{p}": percentil(total, p) for p in (50, 95, 99)},
+                "sql_ms": {f"p{p}": percentil(sql, p) for p in (50, 95, 99)},
+                "consultas": {f"p{p}": percentil(consultas, p) for p in (50, 95, 99)},
+                "plantilla_ms": {f"p{p}": percentil(plantilla, p) for p in (50, 95, 99)},
+                "duplicadas": dict(
+                    sorted(duplicadas.items(), key=lambda d: -d[1])[:5]
+                ),
+            }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(informe, indent=2, ensure_ascii=False))
+        elif not informe:
+            self.stdout.write("No hay muestras. ¿Está activo PERF_INSTRUMENTACION=1?")
+        else:
+            self.stdout.write(
+                f"{'vista':<28}{'n':>6}  {'total p50/p95/p99 (ms)':>26}  "
+                f"{'sql p50/p95/p99 (ms)':>24}  {'consultas p50/p95/p99':>22}"
+            )
+            for vista, datos in informe.items():
+                t, s, c = datos["total_ms"], datos["sql_ms"], datos["consultas"]
+                self.stdout.write(
+                    f"{vista:<28}{datos['peticiones']:>6}  "
+                    f"{t['p50']:>8.1f}{t['p95']:>9.1f}{t['p99']:>9.1f}  "
+                    f"{s['p50']:>8.1f}{s['p95']:>8.1f}{s['p99']:>8.1f}  "
+                    f"{c['p50']:>7}{c['p95']:>7}{c['p99']:>8}"
+                )
+                for sql, veces in datos["duplicadas"].items():
+                    self.stdout.write(f"    repetida x{veces}: {sql[:100]}")
+
+        if options["reiniciar"]:
+            borrar_muestras()
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from gestion.models import ClaveIdempotencia
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra las claves de idempotencia con más de IDEMPOTENCIA_TTL segundos; "
+        "pensado para ejecutarse periódicamente (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--segundos",
+            type=int,
+            default=settings.IDEMPOTENCIA_TTL,
+            help="Antigüedad a partir de la cual se borra una clave.",
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(seconds=options["segundos"])
+        borradas, _ = ClaveIdempotencia.objects.filter(creada__lt=limite).delete()
+        self.stdout.write(self.style.SUCCESS(f"Claves de idempotencia borradas: {borradas}"))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from gestion.models import Reserva, OcupacionNoche
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye desde cero el calendario de ocupación (OcupacionNoche) "
+        "a partir de las reservas activas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=5000,
+            help="Cantidad de noches insertadas por bulk_create.",
+        )
+
+    def handle(self, *args, **options):
+        tamano_lote = options["lote"]
+        esperadas = 0
+
+        with transaction.atomic():
+            OcupacionNoche.objects.all().delete()
+
+            lote = []
+            reservas = Reserva.objects.activas().only(
+                "pk", "habitacion_id", "fecha_inicio", "fecha_fin"
+            )
+            for reserva in reservas.iterator(chunk_size=2000):
+                lote.extend(OcupacionNoche.noches_de(reserva))
+                if len(lote) >= tamano_lote:
+                    esperadas += len(lote)
+                    OcupacionNoche.objects.bulk_create(lote, ignore_conflicts=True)
+                    lote = []
+            esperadas += len(lote)
+            OcupacionNoche.objects.bulk_create(lote, ignore_conflicts=True)
+
+            total = OcupacionNoche.objects.count()
+
+        self.stdout.write(f"Noches registradas: {total}")
+        if total < esperadas:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{esperadas - total} noches quedaron fuera porque otra reserva "
+                    "activa ya ocupaba la habitación (reservas solapadas)."
+                )
+            )
+        self.stdout.write(self.style.SUCCESS("Calendario de ocupación reconstruido."))
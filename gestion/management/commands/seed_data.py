@@ -1,20 +1,36 @@
 
 import datetime
 from django.core.management.base import BaseCommand
-from gestion.models import Usuario, Habitacion, Recurso, Clima, Reserva, MovimientoRecurso
+from gestion.dashboard import invalidar_contadores
+from gestion.fragmentos import incrementar_version
+from gestion.models import Usuario, Habitacion, Recurso, Clima, Reserva, MovimientoRecurso, OcupacionNoche
+from gestion.services import reservar, vaciar_tablas
 
 class Command(BaseCommand):
     help = 'Crea datos de prueba para el albergue'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--truncate',
+            action='store_true',
+            help='Vacía las tablas con TRUNCATE en lugar de borrar fila por fila.',
+        )
+
     def handle(self, *args, **kwargs):
         self.stdout.write('Limpiando la base de datos...')
         # Limpiar datos existentes para evitar duplicados
-        Usuario.objects.all().delete()
-        Habitacion.objects.all().delete()
-        Recurso.objects.all().delete()
-        Clima.objects.all().delete()
-        Reserva.objects.all().delete()
-        MovimientoRecurso.objects.all().delete()
+        if kwargs['truncate']:
+            vaciar_tablas([OcupacionNoche, MovimientoRecurso, Reserva, Recurso, Habitacion, Clima])
+            invalidar_contadores()
+            incrementar_version()
+            Usuario.objects.all().delete()
+        else:
+            Usuario.objects.all().delete()
+            Habitacion.objects.all().delete()
+            Recurso.objects.all().delete()
+            Clima.objects.all().delete()
+            Reserva.objects.all().delete()
+            MovimientoRecurso.objects.all().delete()
 
         self.stdout.write('Creando usuarios...')
         admin = Usuario.objects.create_superuser('admin', 'admin@example.com', 'adminpass')
@@ -40,11 +56,11 @@ class Command(BaseCommand):
         Clima.objects.create(fecha=today + datetime.timedelta(days=1), temperatura=22.0, probabilidad_lluvia=40)
 
         self.stdout.write('Creando una reserva de prueba...')
-        Reserva.objects.create(
-            usuario=cliente,
-            habitacion=h101,
-            fecha_inicio=today + datetime.timedelta(days=5),
-            fecha_fin=today + datetime.timedelta(days=10),
+        reservar(
+            cliente,
+            h101,
+            today + datetime.timedelta(days=5),
+            today + datetime.timedelta(days=10),
             estado='confirmada'
         )
 
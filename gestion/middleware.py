@@ -0,0 +1,194 @@
+import logging
+import math
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .routers import estado_limpio, fijar_primaria, hay_replica, hubo_escritura
+
+logger = logging.getLogger("gestion.perf")
+
+CLAVE_VISTAS = "perf:vistas"
+
+
+def _clave_muestras(vista):
+    return f"perf:muestras:{vista}"
+
+
+def _clave_duplicadas(vista):
+    return f"perf:duplicadas:{vista}"
+
+
+def huella(sql):
+    """
+    Huella de una consulta: el SQL parametrizado (los valores van aparte como
+    %s) con los espacios normalizados y las listas IN colapsadas, para que
+    la misma consulta con distintos valores cuente como repetida.
+    """
+    sql = re.sub(r"\s+", " ", sql).strip()
+    return re.sub(r"IN \((%s(, )?)+\)", "IN (...)", sql)
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    if not valores:
+        return 0
+    rango = math.ceil(p / 100 * len(valores))
+    return valores[max(0, min(len(valores), rango) - 1)]
+
+
+def registrar_muestra(vista, muestra, duplicadas):
+    """
+    Agrega la muestra a la ventana móvil de la vista en la caché. Con varios
+    workers hace falta un backend compartido (CACHE_BACKEND=file o db) para
+    que `manage.py perf_report` vea todas las peticiones.
+    """
+    vistas = cache.get(CLAVE_VISTAS, [])
+    if vista not in vistas:
+        cache.set(CLAVE_VISTAS, vistas + [vista], None)
+
+    muestras = cache.get(_clave_muestras(vista), [])
+    muestras.append(muestra)
+    cache.set(_clave_muestras(vista), muestras[-settings.PERF_MUESTRAS :], None)
+
+    if duplicadas:
+        acumuladas = cache.get(_clave_duplicadas(vista), {})
+        for sql, veces in duplicadas.items():
+            acumuladas[sql] = max(acumuladas.get(sql, 0), veces)
+        cache.set(_clave_duplicadas(vista), acumuladas, None)
+
+
+def leer_muestras():
+    """Devuelve {vista: (muestras, consultas_duplicadas)} de todas las vistas registradas."""
+    return {
+        vista: (
+            cache.get(_clave_muestras(vista), []),
+            cache.get(_clave_duplicadas(vista), {}),
+        )
+        for vista in cache.get(CLAVE_VISTAS, [])
+    }
+
+
+def borrar_muestras():
+    vistas = cache.get(CLAVE_VISTAS, [])
+    cache.delete_many(
+        [CLAVE_VISTAS]
+        + [_clave_muestras(v) for v in vistas]
+        + [_clave_duplicadas(v) for v in vistas]
+    )
+
+
+class InstrumentacionMiddleware:
+    """
+    Middleware opcional (PERF_INSTRUMENTACION=1) que mide, por nombre de URL,
+    la cantidad de consultas, el tiempo total de SQL, el tiempo de render de
+    la plantilla (respuestas TemplateResponse) y las consultas repetidas.
+    Agrega un encabezado Server-Timing a cada respuesta y avisa en el log
+    "gestion.perf" cuando una vista supera su presupuesto de consultas
+    (PERF_PRESUPUESTO_CONSULTAS).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        consultas = Counter()
+        tiempo_sql = 0.0
+
+        def medir(execute, sql, params, many, context):
+            nonlocal tiempo_sql
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                tiempo_sql += time.perf_counter() - inicio
+                consultas[huella(sql)] += 1
+
+        request._perf_plantilla = 0.0
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            # También las consultas que el router envía a la réplica.
+            for alias in connections:
+                pila.enter_context(connections[alias].execute_wrapper(medir))
+            response = self.get_response(request)
+        total = time.perf_counter() - inicio
+
+        # Las respuestas en streaming siguen consultando después de este punto.
+        if response.streaming:
+            return response
+
+        match = getattr(request, "resolver_match", None)
+        vista = (match.url_name if match else None) or "sin_nombre"
+        num_consultas = sum(consultas.values())
+        duplicadas = {sql: n for sql, n in consultas.items() if n > 1}
+
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={tiempo_sql * 1000:.1f};desc="{num_consultas} consultas"',
+                f"tpl;dur={request._perf_plantilla * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ]
+        )
+
+        presupuesto = settings.PERF_PRESUPUESTO_CONSULTAS.get(vista)
+        if presupuesto is not None and num_consultas > presupuesto:
+            logger.warning(
+                "La vista %s hizo %d consultas (presupuesto %d): %s",
+                vista,
+                num_consultas,
+                presupuesto,
+                request.path,
+            )
+
+        registrar_muestra(
+            vista,
+            [
+                round(total * 1000, 3),
+                round(tiempo_sql * 1000, 3),
+                num_consultas,
+                round(request._perf_plantilla * 1000, 3),
+            ],
+            duplicadas,
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        # Se renderiza aquí para poder medirlo; el handler ya no lo repite.
+        inicio = time.perf_counter()
+        response.render()
+        request._perf_plantilla = time.perf_counter() - inicio
+        return response
+
+
+class ReplicaMiddleware:
+    """
+    Reinicia en cada petición el estado de gestion.routers.ReplicaRouter.
+    Si la petición escribió en la base de datos, deja una cookie durante
+    REPLICA_RETRASO_MAXIMO segundos; mientras exista, las lecturas de ese
+    navegador van a la primaria aunque la réplica todavía no tenga sus cambios.
+    """
+
+    COOKIE = "leer_primaria"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with estado_limpio():
+            if request.COOKIES.get(self.COOKIE):
+                fijar_primaria()
+            response = self.get_response(request)
+            if hubo_escritura() and hay_replica():
+                response.set_cookie(
+                    self.COOKIE,
+                    "1",
+                    max_age=settings.REPLICA_RETRASO_MAXIMO,
+                    httponly=True,
+                    samesite="Lax",
+                )
+        return response
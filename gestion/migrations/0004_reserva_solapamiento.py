@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:10
+
+from django.db import migrations, models
+
+
+RESTRICCION = "reserva_sin_solapamiento"
+
+
+def crear_restriccion_exclusion(apps, schema_editor):
+    """
+    En PostgreSQL impide a nivel de base de datos que dos reservas activas
+    de la misma habitación se solapen, usando un daterange semiabierto.
+    En otros motores no hace nada: queda solo la validación de Reserva.clean().
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT COUNT(*)
+            FROM gestion_reserva a
+            JOIN gestion_reserva b
+              ON a.habitacion_id = b.habitacion_id
+             AND a.id < b.id
+             AND a.fecha_inicio < b.fecha_fin
+             AND a.fecha_fin > b.fecha_inicio
+            WHERE a.estado IN ('pendiente', 'confirmada')
+              AND b.estado IN ('pendiente', 'confirmada')
+            """
+        )
+        (solapadas,) = cursor.fetchone()
+    if solapadas:
+        raise RuntimeError(
+            f"Hay {solapadas} pares de reservas activas solapadas. "
+            "Cancela las sobrantes antes de aplicar esta migración."
+        )
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        f"""
+        ALTER TABLE gestion_reserva
+        ADD CONSTRAINT {RESTRICCION}
+        EXCLUDE USING gist (
+            habitacion_id WITH =,
+            daterange(fecha_inicio, fecha_fin, '[)') WITH &&
+        )
+        WHERE (estado IN ('pendiente', 'confirmada'))
+        """
+    )
+
+
+def eliminar_restriccion_exclusion(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"ALTER TABLE gestion_reserva DROP CONSTRAINT IF EXISTS {RESTRICCION}"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0003_contacto'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['habitacion', 'estado', 'fecha_inicio', 'fecha_fin'], name='reserva_hab_estado_fechas_idx'),
+        ),
+        migrations.RunPython(crear_restriccion_exclusion, eliminar_restriccion_exclusion),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:12
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def poblar_ocupacion(apps, schema_editor):
+    """Genera el calendario de ocupación a partir de las reservas activas."""
+    Reserva = apps.get_model("gestion", "Reserva")
+    OcupacionNoche = apps.get_model("gestion", "OcupacionNoche")
+    lote = []
+    reservas = Reserva.objects.filter(estado__in=["pendiente", "confirmada"]).values_list(
+        "pk", "habitacion_id", "fecha_inicio", "fecha_fin"
+    )
+    for pk, habitacion_id, fecha_inicio, fecha_fin in reservas.iterator(chunk_size=2000):
+        for i in range((fecha_fin - fecha_inicio).days):
+            lote.append(
+                OcupacionNoche(
+                    habitacion_id=habitacion_id,
+                    fecha=fecha_inicio + timedelta(days=i),
+                    reserva_id=pk,
+                )
+            )
+        if len(lote) >= 5000:
+            OcupacionNoche.objects.bulk_create(lote, ignore_conflicts=True)
+            lote = []
+    OcupacionNoche.objects.bulk_create(lote, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0004_reserva_solapamiento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OcupacionNoche',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('habitacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='noches_ocupadas', to='gestion.habitacion')),
+                ('reserva', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='noches', to='gestion.reserva')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['fecha'], name='ocupacion_fecha_idx')],
+                'constraints': [models.UniqueConstraint(fields=('habitacion', 'fecha'), name='ocupacion_habitacion_fecha_unica')],
+            },
+        ),
+        migrations.RunPython(poblar_ocupacion, migrations.RunPython.noop),
+    ]
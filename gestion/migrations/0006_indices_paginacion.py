@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0005_ocupacionnoche'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimientorecurso',
+            index=models.Index(fields=['fecha', 'id'], name='movimiento_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recurso',
+            index=models.Index(fields=['nombre', 'id'], name='recurso_nombre_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['fecha_inicio', 'id'], name='reserva_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['usuario', 'fecha_inicio', 'id'], name='reserva_usuario_fecha_id_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:15
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def calcular_stock_inicial(apps, schema_editor):
+    """
+    Deja cada recurso conciliado con su historial: el stock inicial es lo que
+    queda al descontar de cantidad_total la suma de sus movimientos.
+    """
+    Recurso = apps.get_model("gestion", "Recurso")
+    recursos = Recurso.objects.annotate(suma=Sum("movimientorecurso__cantidad"))
+    for recurso in recursos.iterator():
+        recurso.stock_inicial = recurso.cantidad_total - (recurso.suma or 0)
+        recurso.save(update_fields=["stock_inicial"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0006_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurso',
+            name='stock_inicial',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(calcular_stock_inicial, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,26 @@
+import base64
+import hashlib
+import json
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth.mixins import UserPassesTestMixin
+from django.contrib.messages import get_messages
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.views.decorators.http import condition
+
+from .fragmentos import version
+from .models import ClaveIdempotencia
+
+
+def es_administrador(usuario):
+    return usuario.is_authenticated and usuario.rol == "administrador"
 
 
 class AdminRequiredMixin(UserPassesTestMixin):
@@ -7,7 +29,303 @@ class AdminRequiredMixin(UserPassesTestMixin):
     """
 
     def test_func(self):
-        return (
-            self.request.user.is_authenticated
-            and self.request.user.rol == "administrador"
+        return es_administrador(self.request.user)
+
+
+class ConsultaOptimizadaMixin:
+    """
+    Mixin para ListViews que evita consultas N+1: carga con JOIN las
+    relaciones de `select_related` y trae solo las columnas de `only`.
+    Ambas listas deben cubrir lo que la plantilla muestra.
+    """
+
+    select_related = ()
+    only = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.only:
+            queryset = queryset.only(*self.only)
+        return queryset
+
+
+class PaginacionCursorMixin:
+    """
+    Paginación por cursor (keyset) para ListViews.
+
+    Ordena por el primer campo de `ordering` con la pk como desempate y, en
+    lugar de OFFSET, filtra a partir de la última fila vista. Cada página
+    cuesta lo mismo que la primera. Los cursores viajan en los parámetros
+    GET `despues` y `antes`.
+    """
+
+    tamano_pagina = 50
+
+    def _campo_orden(self):
+        campo = self.get_ordering()[0]
+        return campo.lstrip("-"), campo.startswith("-")
+
+    @staticmethod
+    def codificar_cursor(valor, pk):
+        datos = json.dumps([str(valor), pk]).encode()
+        return base64.urlsafe_b64encode(datos).decode().rstrip("=")
+
+    def decodificar_cursor(self, cursor):
+        """Devuelve (valor, pk) o None si el cursor no es válido."""
+        campo, _ = self._campo_orden()
+        try:
+            relleno = "=" * (-len(cursor) % 4)
+            datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+            if not isinstance(datos, list) or len(datos) != 2:
+                return None
+            valor = self.model._meta.get_field(campo).to_python(datos[0])
+            pk = int(datos[1])
+        except (ValueError, TypeError, ValidationError):
+            return None
+        # Un valor nulo no se puede comparar en el filtro (p. ej. [null, 1]).
+        return None if valor is None else (valor, pk)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        campo, descendente = self._campo_orden()
+
+        self.direccion = None
+        cursor = None
+        for direccion in ("despues", "antes"):
+            if self.request.GET.get(direccion):
+                cursor = self.decodificar_cursor(self.request.GET[direccion])
+                if cursor is not None:
+                    self.direccion = direccion
+                break
+
+        # Hacia atrás se recorre el orden invertido y luego se da vuelta la página.
+        invertir = self.direccion == "antes"
+        hacia_menores = descendente != invertir
+        prefijo = "-" if hacia_menores else ""
+        queryset = queryset.order_by(f"{prefijo}{campo}", f"{prefijo}pk")
+
+        if cursor is not None:
+            valor, pk = cursor
+            op = "lt" if hacia_menores else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{campo}__{op}": valor}) | Q(**{campo: valor, f"pk__{op}": pk})
+            )
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        pagina = PaginaCursor(self)
+        kwargs["object_list"] = pagina
+        context = super().get_context_data(**kwargs)
+        # Métodos: la plantilla los llama y solo entonces se consulta la página.
+        context["cursor_siguiente"] = pagina.cursor_siguiente
+        context["cursor_anterior"] = pagina.cursor_anterior
+        return context
+
+
+class PaginaCursor:
+    """
+    Página de PaginacionCursorMixin que se consulta recién cuando la
+    plantilla la recorre o pide un cursor. Si ese trozo de la plantilla sale
+    de la caché de fragmentos, la página no se consulta nunca.
+    Las filas pueden ser instancias o diccionarios de values(); en ese caso
+    deben incluir el campo de orden y "pk".
+    """
+
+    def __init__(self, vista, queryset=None):
+        self.vista = vista
+        self.queryset = vista.object_list if queryset is None else queryset
+
+    @staticmethod
+    def _valor(fila, campo):
+        return fila[campo] if isinstance(fila, dict) else getattr(fila, campo)
+
+    @cached_property
+    def _datos(self):
+        vista = self.vista
+        campo, _ = vista._campo_orden()
+        filas = list(self.queryset[: vista.tamano_pagina + 1])
+        hay_mas = len(filas) > vista.tamano_pagina
+        filas = filas[: vista.tamano_pagina]
+        if vista.direccion == "antes":
+            filas.reverse()
+
+        hay_siguiente = hay_mas if vista.direccion != "antes" else True
+        hay_anterior = {None: False, "despues": True, "antes": hay_mas}[vista.direccion]
+
+        siguiente = (
+            vista.codificar_cursor(
+                self._valor(filas[-1], campo), self._valor(filas[-1], "pk")
+            )
+            if filas and hay_siguiente
+            else None
+        )
+        anterior = (
+            vista.codificar_cursor(
+                self._valor(filas[0], campo), self._valor(filas[0], "pk")
+            )
+            if filas and hay_anterior
+            else None
+        )
+        return filas, siguiente, anterior
+
+    def __iter__(self):
+        return iter(self._datos[0])
+
+    def __len__(self):
+        return len(self._datos[0])
+
+    def __bool__(self):
+        return bool(self._datos[0])
+
+    def cursor_siguiente(self):
+        return self._datos[1]
+
+    def cursor_anterior(self):
+        return self._datos[2]
+
+
+class FragmentoCacheMixin:
+    """
+    Mixin para listados cuyo contenido se cachea con {% cache %} en la
+    plantilla. Agrega al contexto `version_fragmento`, que cambia cada vez
+    que se guarda o borra una fila de `modelos_fragmento` (por defecto, el
+    modelo de la vista), y `fragmento_timeout`. La clave del fragmento debe
+    incluir además todo lo que cambie el HTML: rol y parámetros GET.
+    """
+
+    modelos_fragmento = None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        modelos = self.modelos_fragmento or (self.model,)
+        context["version_fragmento"] = "-".join(str(version(m)) for m in modelos)
+        context["fragmento_timeout"] = settings.FRAGMENTOS_CACHE_TIMEOUT
+        return context
+
+
+class GetCondicionalMixin:
+    """
+    GET condicional para listados con PaginacionCursorMixin. El ETag resume
+    las filas de la página pedida (más la siguiente, que decide si hay otra
+    página): sus pks y su `actualizado`, y el `actualizado` de las
+    `relaciones_etag` que muestra la plantilla, junto con el usuario y la URL
+    completa. Un alta, baja o edición que cambie la página cambia el ETag;
+    consultarlo cuesta lo mismo que la página, sin importar el tamaño de la
+    tabla. Si el cliente ya tiene esa versión se responde 304 sin renderizar
+    la plantilla. No se usa Last-Modified: no cambia al borrar filas.
+    Va después de los mixins de acceso para no responder a anónimos.
+    """
+
+    relaciones_etag = ()
+
+    def _estado(self):
+        campos = ["pk", "actualizado"] + [
+            f"{relacion}__actualizado" for relacion in self.relaciones_etag
+        ]
+        return list(self.get_queryset()[: self.tamano_pagina + 1].values_list(*campos))
+
+    def get_etag(self, request):
+        # Un mensaje pendiente cambia la página aunque los datos sean los mismos.
+        if len(get_messages(request)):
+            return None
+        partes = [request.get_full_path(), request.user.pk, self._estado()]
+        return hashlib.md5(repr(partes).encode()).hexdigest()
+
+    def dispatch(self, request, *args, **kwargs):
+        vista = condition(etag_func=lambda request, *a, **k: self.get_etag(request))(
+            super().dispatch
+        )
+        return vista(request, *args, **kwargs)
+
+
+class IdempotenciaMixin:
+    """
+    Hace idempotentes los POST que crean datos. El formulario lleva una clave
+    en el campo oculto `clave_idempotencia` (la plantilla lo incluye con la
+    variable de contexto del mismo nombre) y los clientes de la API la envían
+    en el encabezado Idempotency-Key. La primera petición con una clave
+    ejecuta la vista y guarda su respuesta en ClaveIdempotencia; las
+    repeticiones reciben esa respuesta sin pasar por la validación ni por la
+    escritura. Solo se guardan las escrituras exitosas (201 o una
+    redirección); si la vista rechaza el formulario la clave queda libre
+    para reintentar. Sin clave, el POST se procesa como siempre. Una
+    respuesta con más de IDEMPOTENCIA_TTL segundos ya no se repite: la clave
+    cuenta como nueva aunque `purgar_idempotencia` todavía no la haya borrado.
+    Va después de los mixins de acceso.
+    """
+
+    CAMPO_IDEMPOTENCIA = "clave_idempotencia"
+    ENCABEZADO_IDEMPOTENCIA = "Idempotency-Key"
+
+    def clave_idempotencia(self):
+        clave = self.request.POST.get(self.CAMPO_IDEMPOTENCIA) or self.request.headers.get(
+            self.ENCABEZADO_IDEMPOTENCIA
+        )
+        return (clave or "").strip()[:64]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Al volver a mostrar un formulario rechazado se conserva la clave.
+        context[self.CAMPO_IDEMPOTENCIA] = self.clave_idempotencia() or uuid.uuid4().hex
+        return context
+
+    def dispatch(self, request, *args, **kwargs):
+        clave = self.clave_idempotencia() if request.method == "POST" else ""
+        if not clave or not request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+
+        registro = ClaveIdempotencia.objects.filter(usuario=request.user, clave=clave).first()
+        vencida = registro is not None and registro.creada < timezone.now() - timedelta(
+            seconds=settings.IDEMPOTENCIA_TTL
+        )
+        if registro is not None and not vencida:
+            return self._repetir(registro)
+
+        with transaction.atomic():
+            if vencida:
+                ClaveIdempotencia.objects.filter(pk=registro.pk).delete()
+            # La fila se reserva antes de ejecutar la vista. Una repetición
+            # simultánea espera en el índice único hasta que esta transacción
+            # termina y luego devuelve la respuesta guardada.
+            try:
+                with transaction.atomic():
+                    registro = ClaveIdempotencia.objects.create(
+                        usuario=request.user, clave=clave, ruta=request.path[:200]
+                    )
+            except IntegrityError:
+                registro = ClaveIdempotencia.objects.get(usuario=request.user, clave=clave)
+                return self._repetir(registro)
+
+            response = super().dispatch(request, *args, **kwargs)
+            if response.streaming or not (
+                response.status_code == 201 or 300 <= response.status_code < 400
+            ):
+                transaction.set_rollback(True)
+                return response
+
+            registro.estado_http = response.status_code
+            registro.tipo_contenido = response.get("Content-Type", "")
+            registro.cuerpo = response.content
+            registro.ubicacion = response.get("Location", "")
+            registro.save(
+                update_fields=["estado_http", "tipo_contenido", "cuerpo", "ubicacion"]
+            )
+        return response
+
+    def _repetir(self, registro):
+        if registro.ruta != self.request.path[:200] or not registro.estado_http:
+            return JsonResponse(
+                {"errores": {"__all__": ["La clave de idempotencia ya se usó en otra petición."]}},
+                status=422,
+            )
+        response = HttpResponse(
+            bytes(registro.cuerpo),
+            status=registro.estado_http,
+            content_type=registro.tipo_contenido or None,
         )
+        if registro.ubicacion:
+            response["Location"] = registro.ubicacion
+        response["Idempotent-Replayed"] = "true"
+        return response
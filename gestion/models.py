@@ -1,7 +1,13 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, F, Sum
+from django.db.models.functions import Now
+from collections import defaultdict
+from datetime import timedelta
+
+# Nombre de la restricción de exclusión creada en PostgreSQL (migración 0004).
+RESTRICCION_SOLAPAMIENTO = "reserva_sin_solapamiento"
 
 
 class Usuario(AbstractUser):
@@ -21,6 +27,19 @@ class Usuario(AbstractUser):
     rol = models.CharField(max_length=20, choices=ROL_CHOICES, default="cliente")
 
 
+class HabitacionQuerySet(models.QuerySet):
+    def disponibles(self, fecha_inicio, fecha_fin):
+        """
+        Habitaciones reservables en [fecha_inicio, fecha_fin): excluye las que
+        están en mantenimiento y las que tienen una reserva activa que se
+        solapa. Se resuelve en una sola consulta con un anti-join (NOT EXISTS).
+        """
+        ocupada = OcupacionNoche.objects.filter(
+            habitacion=OuterRef("pk"), fecha__gte=fecha_inicio, fecha__lt=fecha_fin
+        )
+        return self.exclude(estado="mantenimiento").filter(~Exists(ocupada))
+
+
 class Habitacion(models.Model):
     """
     Representa una habitación en el albergue.
@@ -43,11 +62,69 @@ class Habitacion(models.Model):
     estado = models.CharField(
         max_length=20, choices=ESTADO_CHOICES, default="disponible"
     )
+    # Última modificación; sirve de validador para los GET condicionales.
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = HabitacionQuerySet.as_manager()
 
     def __str__(self):
         return f"Habitación {self.numero} ({self.tipo})"
 
 
+class ReservaQuerySet(models.QuerySet):
+    """
+    Consultas de disponibilidad sobre reservas.
+    Los intervalos se tratan como semiabiertos [fecha_inicio, fecha_fin):
+    una salida y una entrada el mismo día no se consideran un choque.
+    """
+
+    def activas(self):
+        """Reservas que bloquean la habitación (pendientes o confirmadas)."""
+        return self.filter(estado__in=Reserva.ESTADOS_ACTIVOS)
+
+    def solapadas(self, fecha_inicio, fecha_fin):
+        """Reservas cuyo intervalo se cruza con [fecha_inicio, fecha_fin)."""
+        return self.filter(fecha_inicio__lt=fecha_fin, fecha_fin__gt=fecha_inicio)
+
+    def hay_solapamiento(self, habitacion, fecha_inicio, fecha_fin, excluir_pk=None):
+        """
+        Indica si existe una reserva activa de la habitación que choque con
+        [fecha_inicio, fecha_fin).
+
+        Primero revisa solo la última reserva que empieza antes de fecha_fin:
+        es una búsqueda directa en el índice y resuelve el caso habitual de
+        choque. Que esa no choque solo garantiza que no haya choque si las
+        reservas activas de la habitación no se solapan entre sí, algo que la
+        base de datos solo impone en PostgreSQL (y que las cargas masivas
+        pueden haber roto, ver `manage.py audit_overbooking`). Por eso, en
+        ese caso se confirma en el calendario de ocupación, leyendo solo las
+        noches pedidas: el costo no crece con el historial de la habitación.
+        """
+        candidatas = self.activas().filter(habitacion=habitacion)
+        if excluir_pk is not None:
+            candidatas = candidatas.exclude(pk=excluir_pk)
+        # Una búsqueda por estado: con el índice (habitacion, estado,
+        # fecha_inicio, fecha_fin) cada una es un descenso directo al último
+        # registro, mientras que un estado__in obligaría a ordenar todo el rango.
+        fines = [
+            candidatas.filter(estado=estado, fecha_inicio__lt=fecha_fin)
+            .order_by("-fecha_inicio")
+            .values_list("fecha_fin", flat=True)
+            .first()
+            for estado in Reserva.ESTADOS_ACTIVOS
+        ]
+        ultima_fin = max((fin for fin in fines if fin is not None), default=None)
+        if ultima_fin is not None and ultima_fin > fecha_inicio:
+            return True
+
+        noches = OcupacionNoche.objects.filter(
+            habitacion=habitacion, fecha__gte=fecha_inicio, fecha__lt=fecha_fin
+        )
+        if excluir_pk is not None:
+            noches = noches.exclude(reserva_id=excluir_pk)
+        return noches.exists()
+
+
 class Reserva(models.Model):
     """
     Representa una reserva de una habitación por un usuario.
@@ -59,6 +136,7 @@ class Reserva(models.Model):
         ("confirmada", "Confirmada"),
         ("cancelada", "Cancelada"),
     )
+    ESTADOS_ACTIVOS = ("pendiente", "confirmada")
     usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE)
     habitacion = models.ForeignKey(Habitacion, on_delete=models.CASCADE)
     fecha_inicio = models.DateField()
@@ -66,6 +144,33 @@ class Reserva(models.Model):
     estado = models.CharField(
         max_length=20, choices=ESTADO_CHOICES, default="pendiente"
     )
+    # Última modificación; sirve de validador para los GET condicionales.
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = ReservaQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Búsqueda de solapamientos: reservas de una habitación y estado,
+            # ordenadas por fecha de inicio.
+            models.Index(
+                fields=["habitacion", "estado", "fecha_inicio", "fecha_fin"],
+                name="reserva_hab_estado_fechas_idx",
+            ),
+            # Paginación por cursor del listado (general y por cliente).
+            models.Index(fields=["fecha_inicio", "id"], name="reserva_fecha_id_idx"),
+            models.Index(
+                fields=["usuario", "fecha_inicio", "id"],
+                name="reserva_usuario_fecha_id_idx",
+            ),
+            # Pendientes vencidas (manage.py expirar_reservas): índice parcial,
+            # solo contiene las reservas pendientes.
+            models.Index(
+                fields=["actualizado", "id"],
+                condition=models.Q(estado="pendiente"),
+                name="reserva_pendiente_act_idx",
+            ),
+        ]
 
     def clean(self):
         """
@@ -78,34 +183,122 @@ class Reserva(models.Model):
                     "La fecha de fin debe ser posterior a la fecha de inicio."
                 )
 
-            reservas_superpuestas = (
-                Reserva.objects.filter(
-                    habitacion=self.habitacion, estado__in=["pendiente", "confirmada"]
+            # Sin habitación todavía (p. ej. al validar ReservaClienteForm) no
+            # hay con qué comparar; la valida después services.guardar_reserva.
+            if (
+                self.habitacion_id is not None
+                and self.estado in self.ESTADOS_ACTIVOS
+                and Reserva.objects.hay_solapamiento(
+                    self.habitacion_id, self.fecha_inicio, self.fecha_fin, excluir_pk=self.pk
                 )
-                .filter(
-                    Q(fecha_inicio__range=(self.fecha_inicio, self.fecha_fin))
-                    | Q(fecha_fin__range=(self.fecha_inicio, self.fecha_fin))
-                    | Q(
-                        fecha_inicio__lte=self.fecha_inicio,
-                        fecha_fin__gte=self.fecha_fin,
-                    )
+            ):
+                raise ValidationError(
+                    f"La habitación {self.habitacion.numero} ya está reservada en estas fechas."
                 )
-                .exclude(pk=self.pk)
-            )
 
-            if reservas_superpuestas.exists():
+    # Campos que determinan las noches ocupadas por la reserva.
+    CAMPOS_OCUPACION = ("habitacion_id", "estado", "fecha_inicio", "fecha_fin")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._ocupacion_guardada = instancia._datos_ocupacion()
+        return instancia
+
+    def _datos_ocupacion(self):
+        # Un campo diferido (only/defer) que no se asignó no cambió.
+        return tuple(self.__dict__.get(campo) for campo in self.CAMPOS_OCUPACION)
+
+    def save(self, *args, validar=True, **kwargs):
+        """
+        Valida y guarda la reserva. En PostgreSQL la restricción de exclusión
+        rechaza además los solapamientos que se cuelan entre la validación y el
+        INSERT; ese error se traduce al mismo ValidationError de clean().
+        Con validar=False no se repite clean(): lo usa services.guardar_reserva,
+        que ya validó con la habitación bloqueada.
+        Las noches del calendario solo se rehacen si la reserva es nueva o
+        cambió su habitación, estado o fechas.
+        """
+        if validar:
+            self.clean()
+        datos = self._datos_ocupacion()
+        cambio = self._state.adding or datos != getattr(self, "_ocupacion_guardada", None)
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                if cambio:
+                    self.sincronizar_ocupacion()
+            self._ocupacion_guardada = datos
+        except IntegrityError as e:
+            if RESTRICCION_SOLAPAMIENTO in str(e):
                 raise ValidationError(
                     f"La habitación {self.habitacion.numero} ya está reservada en estas fechas."
-                )
+                ) from e
+            raise
 
-    def save(self, *args, **kwargs):
-        self.clean()
-        super().save(*args, **kwargs)
+    def sincronizar_ocupacion(self):
+        """
+        Rehace las noches de esta reserva en el calendario de ocupación.
+        Una reserva activa ocupa cada noche de [fecha_inicio, fecha_fin);
+        una cancelada no ocupa ninguna. El borrado de la reserva elimina sus
+        noches por cascada.
+        """
+        OcupacionNoche.objects.filter(reserva=self).delete()
+        if self.estado not in self.ESTADOS_ACTIVOS:
+            return
+        try:
+            OcupacionNoche.objects.bulk_create(OcupacionNoche.noches_de(self))
+        except IntegrityError as e:
+            raise ValidationError(
+                f"La habitación {self.habitacion.numero} ya está reservada en estas fechas."
+            ) from e
 
     def __str__(self):
         return f"Reserva de {self.usuario} en {self.habitacion}"
 
 
+class OcupacionNoche(models.Model):
+    """
+    Calendario de ocupación materializado: una fila por cada noche que una
+    reserva activa ocupa en una habitación. Se mantiene desde Reserva.save()
+    y se reconstruye desde cero con `manage.py reconstruir_ocupacion`.
+    """
+
+    habitacion = models.ForeignKey(
+        Habitacion, on_delete=models.CASCADE, related_name="noches_ocupadas"
+    )
+    fecha = models.DateField()
+    reserva = models.ForeignKey(
+        Reserva, on_delete=models.CASCADE, related_name="noches"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["habitacion", "fecha"], name="ocupacion_habitacion_fecha_unica"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["fecha"], name="ocupacion_fecha_idx"),
+        ]
+
+    @staticmethod
+    def noches_de(reserva):
+        """Filas (sin guardar) correspondientes a las noches de una reserva."""
+        noches = (reserva.fecha_fin - reserva.fecha_inicio).days
+        return [
+            OcupacionNoche(
+                habitacion_id=reserva.habitacion_id,
+                fecha=reserva.fecha_inicio + timedelta(days=i),
+                reserva_id=reserva.pk,
+            )
+            for i in range(noches)
+        ]
+
+    def __str__(self):
+        return f"Habitación {self.habitacion_id} ocupada el {self.fecha}"
+
+
 class Clima(models.Model):
     """
     Almacena información del clima para una fecha específica.
@@ -115,6 +308,8 @@ class Clima(models.Model):
     temperatura = models.DecimalField(max_digits=5, decimal_places=2)
     probabilidad_lluvia = models.IntegerField()
     comentarios = models.TextField(blank=True, null=True)
+    # Última modificación; sirve de validador para los GET condicionales.
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"Clima para {self.fecha}"
@@ -133,15 +328,85 @@ class Recurso(models.Model):
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
     cantidad_total = models.IntegerField()
     unidad = models.CharField(max_length=50)
+    # Stock con el que se dio de alta el recurso. En todo momento
+    # cantidad_total == stock_inicial + suma de sus movimientos.
+    stock_inicial = models.IntegerField(default=0, editable=False)
+    # Última modificación; sirve de validador para los GET condicionales.
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["nombre", "id"], name="recurso_nombre_id_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Al crear el recurso, la cantidad indicada queda como stock inicial.
+        Después cantidad_total solo cambia con movimientos, así que editar el
+        recurso no la sobrescribe (evita pisar incrementos concurrentes).
+        """
+        if self._state.adding:
+            self.stock_inicial = self.cantidad_total
+        elif kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name
+                for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in ("cantidad_total", "stock_inicial")
+            ]
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def ajustar_stock(ajustes):
+        """
+        Aplica en la base de datos un diccionario {recurso_id: delta} con
+        UPDATE ... SET cantidad_total = cantidad_total + delta. Los recursos se
+        actualizan en orden de pk para que transacciones concurrentes tomen
+        los bloqueos en el mismo orden.
+        """
+        for recurso_id, delta in sorted(ajustes.items()):
+            if delta:
+                Recurso.objects.filter(pk=recurso_id).update(
+                    cantidad_total=F("cantidad_total") + delta, actualizado=Now()
+                )
 
     def __str__(self):
         return self.nombre
 
 
+class MovimientoRecursoQuerySet(models.QuerySet):
+    def delete(self):
+        """
+        Borra los movimientos y descuenta del stock la suma de cada recurso
+        con un UPDATE por recurso, en la misma transacción. Bloquea antes los
+        recursos afectados: un movimiento nuevo de esos recursos no puede
+        confirmarse entre la suma y el borrado.
+        """
+        with transaction.atomic():
+            list(
+                Recurso.objects.select_for_update()
+                .filter(pk__in=self.order_by().values("recurso_id"))
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+            ajustes = {
+                recurso_id: -total
+                for recurso_id, total in self.order_by()
+                .values("recurso_id")
+                .annotate(total=Sum("cantidad"))
+                .values_list("recurso_id", "total")
+            }
+            resultado = super().delete()
+            Recurso.ajustar_stock(ajustes)
+        return resultado
+
+
 class MovimientoRecurso(models.Model):
     """
     Registra los movimientos (ingresos o egresos) de stock de un recurso.
-    Actualiza automáticamente la cantidad total del recurso al guardarse.
+    Actualiza automáticamente la cantidad total del recurso al guardarse,
+    editarse o eliminarse, también en borrados masivos (ver
+    MovimientoRecursoQuerySet.delete). Al borrar el recurso sus movimientos
+    se eliminan por cascada sin ajustar nada.
     """
 
     recurso = models.ForeignKey(Recurso, on_delete=models.CASCADE)
@@ -149,15 +414,39 @@ class MovimientoRecurso(models.Model):
     cantidad = models.IntegerField()
     motivo = models.TextField()
 
+    objects = MovimientoRecursoQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["fecha", "id"], name="movimiento_fecha_id_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         """
-        Sobrescribe el método save para actualizar el stock del recurso asociado
-        cuando se crea un nuevo movimiento.
+        Sobrescribe el método save para actualizar el stock del recurso asociado.
+        Un movimiento nuevo suma su cantidad; una edición aplica la diferencia
+        (también si cambió de recurso). El movimiento y el ajuste de stock se
+        escriben en la misma transacción y el incremento lo hace la base de datos.
         """
-        if not self.pk:
-            self.recurso.cantidad_total += self.cantidad
-            self.recurso.save()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            ajustes = defaultdict(int)
+            if not self._state.adding:
+                anterior = (
+                    MovimientoRecurso.objects.select_for_update()
+                    .values("recurso_id", "cantidad")
+                    .get(pk=self.pk)
+                )
+                ajustes[anterior["recurso_id"]] -= anterior["cantidad"]
+            ajustes[self.recurso_id] += self.cantidad
+            super().save(*args, **kwargs)
+            Recurso.ajustar_stock(ajustes)
+
+    def delete(self, *args, **kwargs):
+        """Borra el movimiento y descuenta su cantidad del stock del recurso."""
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            Recurso.ajustar_stock({self.recurso_id: -self.cantidad})
+        return resultado
 
     def __str__(self):
         return f"Movimiento de {self.recurso.nombre}: {self.cantidad}"
@@ -175,3 +464,31 @@ class Contacto(models.Model):
 
     def __str__(self):
         return f"Mensaje de {self.nombre} ({self.fecha})"
+
+
+class ClaveIdempotencia(models.Model):
+    """
+    Respuesta guardada de un POST enviado con clave de idempotencia (campo
+    oculto clave_idempotencia o encabezado Idempotency-Key). Si el mismo
+    usuario repite la clave, se devuelve esta respuesta sin volver a
+    ejecutar la vista. `manage.py purgar_idempotencia` borra las vencidas.
+    """
+
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE)
+    clave = models.CharField(max_length=64)
+    ruta = models.CharField(max_length=200)
+    estado_http = models.PositiveSmallIntegerField(default=0)
+    tipo_contenido = models.CharField(max_length=100, blank=True)
+    cuerpo = models.BinaryField(blank=True, default=b"")
+    ubicacion = models.CharField(max_length=200, blank=True)
+    creada = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["usuario", "clave"], name="idempotencia_usuario_clave_unica"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Clave {self.clave} de {self.usuario_id} ({self.ruta})"
@@ -0,0 +1,125 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+REPLICA = "replica"
+PRIMARIA = "default"
+
+# Estado por petición (o por hilo en comandos): si las lecturas pueden ir a
+# la réplica, si la petición llegó fijada a la primaria (cookie de una
+# escritura reciente) y si ya escribió.
+_leer_de_replica = ContextVar("leer_de_replica", default=False)
+_primaria_fijada = ContextVar("primaria_fijada", default=False)
+_hubo_escritura = ContextVar("hubo_escritura", default=False)
+
+
+def _replicable(model):
+    """
+    Solo los datos de la aplicación. Sesiones y usuarios se leen siempre de
+    la primaria: con una réplica atrasada, quien acaba de iniciar sesión o
+    de registrarse aparecería como anónimo.
+    """
+    return (
+        model._meta.app_label == "gestion"
+        and model._meta.label != settings.AUTH_USER_MODEL
+    )
+
+
+def hay_replica():
+    return REPLICA in settings.DATABASES
+
+
+def fijar_primaria():
+    """Desde aquí, todas las lecturas de la petición van a la primaria."""
+    _primaria_fijada.set(True)
+
+
+def hubo_escritura():
+    return _hubo_escritura.get()
+
+
+@contextmanager
+def lecturas_en_replica():
+    """Dentro del bloque, las lecturas del ORM van a la réplica si existe."""
+    token = _leer_de_replica.set(True)
+    try:
+        yield
+    finally:
+        _leer_de_replica.reset(token)
+
+
+@contextmanager
+def estado_limpio():
+    """Aísla el estado del router; lo usa ReplicaMiddleware en cada petición."""
+    tokens = [
+        (variable, variable.set(False))
+        for variable in (_leer_de_replica, _primaria_fijada, _hubo_escritura)
+    ]
+    try:
+        yield
+    finally:
+        for variable, token in tokens:
+            variable.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Envía a la réplica solo las lecturas marcadas con `lecturas_en_replica`
+    (o LecturaReplicaMixin / lectura_en_replica en las vistas); el resto de
+    lecturas y todas las escrituras van a la primaria. Una escritura de un
+    modelo de la aplicación fija la primaria para el resto de la petición, así quien escribe lee lo que
+    acaba de escribir aunque la réplica vaya atrasada; ReplicaMiddleware
+    extiende eso unos segundos más con una cookie (p. ej. a la redirección
+    que sigue a un formulario). Sin alias "replica" en DATABASES todo va a
+    la primaria.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            _leer_de_replica.get()
+            and not _primaria_fijada.get()
+            and not _hubo_escritura.get()
+            and hay_replica()
+            and _replicable(model)
+        ):
+            return REPLICA
+        return PRIMARIA
+
+    def db_for_write(self, model, **hints):
+        # Sesiones, usuarios y la caché en base de datos (CACHE_BACKEND=db)
+        # se leen siempre de la primaria; escribirlos no fija nada.
+        if _replicable(model):
+            _hubo_escritura.set(True)
+        return PRIMARIA
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaria y réplica tienen los mismos datos.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación.
+        return db != REPLICA
+
+
+class LecturaReplicaMixin:
+    """
+    Mixin para vistas de solo lectura: sus consultas se hacen en la réplica.
+    Va antes de los mixins de acceso para que también lo cubran.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        _leer_de_replica.set(True)
+        return super().dispatch(request, *args, **kwargs)
+
+
+def lectura_en_replica(vista):
+    """Decorador equivalente a LecturaReplicaMixin para vistas función."""
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        _leer_de_replica.set(True)
+        return vista(request, *args, **kwargs)
+
+    return envoltura
@@ -0,0 +1,285 @@
+import csv
+import json
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from .dashboard import invalidar_contadores
+from .models import Habitacion, Reserva, Recurso, MovimientoRecurso, OcupacionNoche
+
+
+class LoteInvalido(Exception):
+    """
+    Se lanza cuando alguna fila de un lote no es válida. Contiene la lista de
+    errores como tuplas (numero_de_fila, mensaje); no se guarda ninguna fila.
+    """
+
+    def __init__(self, errores):
+        self.errores = errores
+        super().__init__(f"{len(errores)} filas con errores")
+
+
+def guardar_reserva(reserva):
+    """
+    Guarda una reserva nueva o modificada en una transacción corta: bloquea
+    la fila de su habitación (SELECT ... FOR UPDATE), valida fechas y
+    solapamiento una sola vez y escribe la reserva con su calendario de
+    ocupación. Dos reservas simultáneas de la misma habitación se ejecutan
+    una detrás de otra, así que la segunda ve a la primera y falla.
+    Lanza ValidationError si la reserva no es válida y Habitacion.DoesNotExist
+    si la habitación no existe. Vistas, admin y scripts reservan por aquí.
+    """
+    with transaction.atomic():
+        reserva.habitacion = Habitacion.objects.select_for_update().get(
+            pk=reserva.habitacion_id
+        )
+        reserva.clean()
+        reserva.save(validar=False)
+    return reserva
+
+
+def reservar(usuario, habitacion, fecha_inicio, fecha_fin, estado="pendiente"):
+    """Crea una reserva con guardar_reserva. `habitacion` puede ser la instancia o su pk."""
+    return guardar_reserva(
+        Reserva(
+            usuario=usuario,
+            habitacion_id=getattr(habitacion, "pk", habitacion),
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            estado=estado,
+        )
+    )
+
+
+def reservar_grupo(usuario, habitaciones, fecha_inicio, fecha_fin, estado="pendiente"):
+    """
+    Reserva varias habitaciones para las mismas fechas, todo o nada.
+
+    Bloquea las habitaciones en orden de pk (dos grupos que comparten
+    habitaciones las toman en el mismo orden y no se bloquean mutuamente),
+    comprueba el solapamiento de todas con una sola consulta e inserta las
+    reservas y sus noches con bulk_create. Si alguna habitación no existe o
+    está ocupada se lanza ValidationError y no se reserva ninguna.
+    `habitaciones` puede contener instancias o pks. Devuelve las reservas.
+    """
+    pks = sorted({getattr(habitacion, "pk", habitacion) for habitacion in habitaciones})
+    if not pks:
+        raise ValidationError("Elige al menos una habitación.")
+    if fecha_inicio >= fecha_fin:
+        raise ValidationError("La fecha de fin debe ser posterior a la fecha de inicio.")
+
+    with transaction.atomic():
+        bloqueadas = list(
+            Habitacion.objects.select_for_update().filter(pk__in=pks).order_by("pk")
+        )
+        if len(bloqueadas) != len(pks):
+            raise ValidationError("Alguna de las habitaciones elegidas no existe.")
+
+        if estado in Reserva.ESTADOS_ACTIVOS:
+            ocupadas = sorted(
+                Reserva.objects.activas()
+                .solapadas(fecha_inicio, fecha_fin)
+                .filter(habitacion_id__in=pks)
+                .values_list("habitacion__numero", flat=True)
+                .distinct()
+            )
+            if ocupadas:
+                raise ValidationError(
+                    f"Ya hay reservas en estas fechas para: {', '.join(ocupadas)}."
+                )
+
+        # Las restricciones de la base de datos (exclusión de solapamientos en
+        # PostgreSQL, noche única en el calendario) siguen siendo la última red.
+        try:
+            with transaction.atomic():
+                reservas = Reserva.objects.bulk_create(
+                    Reserva(
+                        usuario=usuario,
+                        habitacion=habitacion,
+                        fecha_inicio=fecha_inicio,
+                        fecha_fin=fecha_fin,
+                        estado=estado,
+                    )
+                    for habitacion in bloqueadas
+                )
+                if estado in Reserva.ESTADOS_ACTIVOS:
+                    OcupacionNoche.objects.bulk_create(
+                        noche
+                        for reserva in reservas
+                        for noche in OcupacionNoche.noches_de(reserva)
+                    )
+        except IntegrityError as e:
+            raise ValidationError(
+                "Otra reserva ocupó alguna de las habitaciones; inténtalo de nuevo."
+            ) from e
+
+    # bulk_create no envía post_save. Al confirmar, por si quien llama tiene
+    # abierta una transacción mayor (p. ej. IdempotenciaMixin).
+    transaction.on_commit(invalidar_contadores)
+    return reservas
+
+
+def expirar_pendientes(horas, tamano_lote=500, pausa=0, simular=False):
+    """
+    Cancela las reservas pendientes sin cambios desde hace más de `horas`
+    horas y libera sus noches del calendario de ocupación.
+
+    Trabaja por lotes de `tamano_lote` reservas, cada uno en su propia
+    transacción corta: bloquea las filas del lote (saltando las que otra
+    transacción tiene bloqueadas, p. ej. una confirmación en curso), las
+    pasa a cancelada con un UPDATE y borra sus noches. Entre lotes espera
+    `pausa` segundos. Con `simular` solo cuenta. Devuelve
+    (reservas canceladas, noches liberadas, habitaciones liberadas).
+    """
+    limite = timezone.now() - timedelta(hours=horas)
+    vencidas = Reserva.objects.filter(estado="pendiente", actualizado__lt=limite)
+    if simular:
+        return (
+            vencidas.count(),
+            OcupacionNoche.objects.filter(reserva__in=vencidas).count(),
+            vencidas.values("habitacion_id").distinct().count(),
+        )
+
+    canceladas = noches = 0
+    habitaciones = set()
+    while True:
+        with transaction.atomic():
+            lote = list(
+                vencidas.select_for_update(skip_locked=True)
+                .order_by("actualizado", "pk")
+                .values_list("pk", "habitacion_id")[:tamano_lote]
+            )
+            if not lote:
+                break
+            pks = [pk for pk, _ in lote]
+            canceladas += Reserva.objects.filter(pk__in=pks).update(
+                estado="cancelada", actualizado=Now()
+            )
+            noches += OcupacionNoche.objects.filter(reserva_id__in=pks).delete()[0]
+            habitaciones.update(habitacion_id for _, habitacion_id in lote)
+        if len(lote) < tamano_lote:
+            break
+        if pausa:
+            time.sleep(pausa)
+
+    if canceladas:
+        # update() no envía post_save.
+        transaction.on_commit(invalidar_contadores)
+    return canceladas, noches, len(habitaciones)
+
+
+def leer_filas(lineas, formato):
+    """
+    Convierte un iterable de líneas de texto (CSV con encabezado o JSONL) en
+    diccionarios, uno por fila, sin cargar el archivo completo en memoria.
+    """
+    if formato == "csv":
+        yield from csv.DictReader(lineas)
+    elif formato == "jsonl":
+        for linea in lineas:
+            if linea.strip():
+                try:
+                    dato = json.loads(linea)
+                except ValueError:
+                    dato = None
+                yield dato if isinstance(dato, dict) else {}
+    else:
+        raise ValueError(f"Formato no soportado: {formato}")
+
+
+def _validar_lote(lote, inicio):
+    """
+    Valida un lote de filas con una sola consulta de recursos.
+    Devuelve (movimientos sin guardar, errores).
+    """
+    ids = set()
+    for fila in lote:
+        try:
+            ids.add(int(fila.get("recurso")))
+        except (TypeError, ValueError):
+            pass
+    existentes = set(Recurso.objects.filter(pk__in=ids).values_list("pk", flat=True))
+
+    movimientos, errores = [], []
+    for numero, fila in enumerate(lote, start=inicio):
+        try:
+            recurso_id = int(fila.get("recurso"))
+            cantidad = int(fila.get("cantidad"))
+        except (TypeError, ValueError):
+            errores.append((numero, "recurso y cantidad deben ser números enteros."))
+            continue
+        motivo = (fila.get("motivo") or "").strip()
+        if recurso_id not in existentes:
+            errores.append((numero, f"El recurso {recurso_id} no existe."))
+        elif not motivo:
+            errores.append((numero, "El motivo es obligatorio."))
+        else:
+            movimientos.append(
+                MovimientoRecurso(recurso_id=recurso_id, cantidad=cantidad, motivo=motivo)
+            )
+    return movimientos, errores
+
+
+def registrar_movimientos(filas, tamano_lote=1000):
+    """
+    Registra muchos movimientos de stock a la vez, todo o nada.
+
+    Las filas ({"recurso", "cantidad", "motivo"}) se validan y se insertan
+    con bulk_create por lotes; el stock de cada recurso se ajusta una sola
+    vez al final con la suma de sus movimientos, dentro de la misma
+    transacción. Si alguna fila es inválida se lanza LoteInvalido con todos
+    los errores y no se guarda nada. Devuelve la cantidad de movimientos creados.
+    """
+    ajustes = defaultdict(int)
+    errores = []
+    creados = 0
+
+    with transaction.atomic():
+        lote, inicio = [], 1
+        for numero, fila in enumerate(filas, start=1):
+            lote.append(fila)
+            if len(lote) >= tamano_lote:
+                creados += _procesar_lote(lote, inicio, ajustes, errores)
+                lote, inicio = [], numero + 1
+        creados += _procesar_lote(lote, inicio, ajustes, errores)
+
+        if errores:
+            raise LoteInvalido(errores)
+        Recurso.ajustar_stock(ajustes)
+
+    return creados
+
+
+def _procesar_lote(lote, inicio, ajustes, errores):
+    movimientos, errores_lote = _validar_lote(lote, inicio)
+    errores.extend(errores_lote)
+    if errores:
+        # Ya no se va a guardar nada; solo se siguen validando filas.
+        return 0
+    MovimientoRecurso.objects.bulk_create(movimientos)
+    for movimiento in movimientos:
+        ajustes[movimiento.recurso_id] += movimiento.cantidad
+    return len(movimientos)
+
+
+def vaciar_tablas(modelos):
+    """
+    Vacía las tablas de los modelos dados sin pasar por el collector de
+    Django, que carga cada fila en memoria para propagar borrados y enviar
+    señales. Usa el mismo SQL que `manage.py flush`: en PostgreSQL un único
+    TRUNCATE ... RESTART IDENTITY CASCADE, en SQLite DELETE sin WHERE y el
+    reinicio de sqlite_sequence, todo dentro de una transacción.
+    No envía señales: quien lo llame debe invalidar las cachés que dependan
+    de estas tablas.
+    """
+    tablas = [modelo._meta.db_table for modelo in modelos]
+    sql = connection.ops.sql_flush(
+        no_style(), tablas, reset_sequences=True, allow_cascade=True
+    )
+    connection.ops.execute_sql_flush(sql)
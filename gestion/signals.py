@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .dashboard import invalidar_contadores
+from .fragmentos import incrementar_version
+from .models import Habitacion, Reserva, Recurso, Clima
+
+
+@receiver([post_save, post_delete], sender=Habitacion)
+@receiver([post_save, post_delete], sender=Reserva)
+@receiver([post_save, post_delete], sender=Recurso)
+def invalidar_dashboard(sender, using, **kwargs):
+    """
+    Los contadores del dashboard se recalculan en la próxima visita. Se
+    invalidan al confirmar la transacción: antes, otra petición podría
+    volver a llenar la caché con los datos viejos.
+    """
+    transaction.on_commit(invalidar_contadores, using=using)
+
+
+@receiver([post_save, post_delete], sender=Habitacion)
+@receiver([post_save, post_delete], sender=Clima)
+def invalidar_fragmentos(sender, using, **kwargs):
+    """
+    Los listados cacheados del modelo se vuelven a renderizar. La versión
+    cambia al confirmar la transacción; si cambiara antes, una petición
+    simultánea guardaría las filas viejas bajo la versión nueva.
+    """
+    transaction.on_commit(lambda: incrementar_version(sender), using=using)
@@ -0,0 +1,29 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+
+register = template.Library()
+
+CDN = "https://cdn.jsdelivr.net/npm/"
+
+# Archivos de terceros, con la versión fijada. Con ESTATICOS_LOCALES se sirven
+# desde static/vendor/<misma ruta> (ver `manage.py descargar_estaticos`), así
+# pasan por el mismo almacenamiento con hash y caché larga que styles.css.
+# Incluye lo que referencian por dentro: fuentes de los iconos y source maps.
+ARCHIVOS_VENDOR = (
+    "bootstrap@5.3.0/dist/css/bootstrap.min.css",
+    "bootstrap@5.3.0/dist/css/bootstrap.min.css.map",
+    "bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js",
+    "bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js.map",
+    "bootstrap-icons@1.11.3/font/bootstrap-icons.min.css",
+    "bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff",
+    "bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff2",
+)
+
+
+@register.simple_tag
+def vendor(ruta):
+    """URL de un archivo de ARCHIVOS_VENDOR: local o del CDN según ESTATICOS_LOCALES."""
+    if settings.ESTATICOS_LOCALES:
+        return static(f"vendor/{ruta}")
+    return CDN + ruta
@@ -1,12 +1,23 @@
 from django.urls import path
+from .api import (
+    HabitacionApiView,
+    ReservaApiView,
+    RecursoApiView,
+    MovimientoRecursoApiView,
+    ClimaApiView,
+)
 from .views import (
     index,
     HabitacionListView,
+    HabitacionDisponibleView,
+    habitaciones_disponibles_api,
+    OcupacionView,
     HabitacionCreateView,
     HabitacionUpdateView,
     HabitacionDeleteView,
     ReservaListView,
     ReservaClienteCreateView,
+    ReservaGrupoView,
     RecursoListView,
     RecursoCreateView,
     RecursoUpdateView,
@@ -18,6 +29,10 @@ from .views import (
     MovimientoRecursoListView,
     MovimientoRecursoCreateView,
     MovimientoRecursoUpdateView,
+    MovimientoRecursoLoteView,
+    ReservaExportView,
+    MovimientoRecursoExportView,
+    ClimaExportView,
     RegistroView,
     LoginView,
     logout_view,
@@ -31,6 +46,37 @@ urlpatterns = [
     path("login/", LoginView.as_view(), name="login"),
     path("logout/", logout_view, name="logout"),
     path("habitaciones/", HabitacionListView.as_view(), name="habitacion_list"),
+    path(
+        "habitaciones/disponibles/",
+        HabitacionDisponibleView.as_view(),
+        name="habitacion_disponible_list",
+    ),
+    path(
+        "api/habitaciones/disponibles/",
+        habitaciones_disponibles_api,
+        name="habitacion_disponible_api",
+    ),
+    path("api/habitaciones/", HabitacionApiView.as_view(), name="api_habitaciones"),
+    path(
+        "api/habitaciones/<int:pk>/",
+        HabitacionApiView.as_view(),
+        name="api_habitacion",
+    ),
+    path("api/reservas/", ReservaApiView.as_view(), name="api_reservas"),
+    path("api/reservas/<int:pk>/", ReservaApiView.as_view(), name="api_reserva"),
+    path("api/recursos/", RecursoApiView.as_view(), name="api_recursos"),
+    path("api/recursos/<int:pk>/", RecursoApiView.as_view(), name="api_recurso"),
+    path(
+        "api/movimientos/", MovimientoRecursoApiView.as_view(), name="api_movimientos"
+    ),
+    path(
+        "api/movimientos/<int:pk>/",
+        MovimientoRecursoApiView.as_view(),
+        name="api_movimiento",
+    ),
+    path("api/clima/", ClimaApiView.as_view(), name="api_clima"),
+    path("api/clima/<int:pk>/", ClimaApiView.as_view(), name="api_clima_detalle"),
+    path("ocupacion/", OcupacionView.as_view(), name="ocupacion"),
     path(
         "habitaciones/crear/", HabitacionCreateView.as_view(), name="habitacion_crear"
     ),
@@ -45,11 +91,13 @@ urlpatterns = [
         name="habitacion_eliminar",
     ),
     path("reservas/", ReservaListView.as_view(), name="reserva_list"),
+    path("reservas/exportar/", ReservaExportView.as_view(), name="reserva_exportar"),
     path(
         "reservas/crear/<int:habitacion_id>/",
         ReservaClienteCreateView.as_view(),
         name="reserva_crear",
     ),
+    path("reservas/grupo/", ReservaGrupoView.as_view(), name="reserva_grupo"),
     path("recursos/", RecursoListView.as_view(), name="recurso_list"),
     path("recursos/crear/", RecursoCreateView.as_view(), name="recurso_crear"),
     path(
@@ -61,6 +109,7 @@ urlpatterns = [
         name="recurso_eliminar",
     ),
     path("clima/", ClimaListView.as_view(), name="clima_list"),
+    path("clima/exportar/", ClimaExportView.as_view(), name="clima_exportar"),
     path("clima/crear/", ClimaCreateView.as_view(), name="clima_crear"),
     path("clima/<int:pk>/editar/", ClimaUpdateView.as_view(), name="clima_editar"),
     path("clima/<int:pk>/eliminar/", ClimaDeleteView.as_view(), name="clima_eliminar"),
@@ -74,6 +123,16 @@ urlpatterns = [
         MovimientoRecursoCreateView.as_view(),
         name="movimiento_recurso_crear",
     ),
+    path(
+        "movimientos/exportar/",
+        MovimientoRecursoExportView.as_view(),
+        name="movimiento_recurso_exportar",
+    ),
+    path(
+        "movimientos/lote/",
+        MovimientoRecursoLoteView.as_view(),
+        name="movimiento_recurso_lote",
+    ),
     path(
         "movimientos/<int:pk>/editar/",
         MovimientoRecursoUpdateView.as_view(),
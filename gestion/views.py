@@ -1,10 +1,36 @@
+from datetime import date, timedelta
+from django.db import router
+from django.db.models import Count
+import csv
+import json
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect
+from django.template.response import TemplateResponse
 from django.urls import reverse_lazy
+from django.utils.functional import cached_property
 from django.views.generic import ListView, View, TemplateView
-from django.views.generic.edit import CreateView, UpdateView, DeleteView
+from django.views.generic.edit import CreateView, UpdateView, DeleteView, FormView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
-from .mixins import AdminRequiredMixin
+from .dashboard import contadores, indicadores
+from .services import (
+    guardar_reserva,
+    reservar_grupo,
+    registrar_movimientos,
+    leer_filas,
+    LoteInvalido,
+)
+from .mixins import (
+    AdminRequiredMixin,
+    ConsultaOptimizadaMixin,
+    FragmentoCacheMixin,
+    GetCondicionalMixin,
+    IdempotenciaMixin,
+    PaginacionCursorMixin,
+)
+from .routers import LecturaReplicaMixin, lectura_en_replica
 from .models import (
     Habitacion,
     Reserva,
@@ -13,6 +39,7 @@ from .models import (
     MovimientoRecurso,
     Usuario,
     Contacto,
+    OcupacionNoche,
 )
 from .forms import (
     HabitacionForm,
@@ -23,30 +50,36 @@ from .forms import (
     LoginForm,
     ContactoForm,
     ReservaClienteForm,
+    ReservaGrupoForm,
+    DisponibilidadForm,
+    CalendarioOcupacionForm,
 )
 from django.shortcuts import get_object_or_404
 
 
 @login_required
+@lectura_en_replica
 def index(request):
     """
     Vista principal del dashboard.
-    Muestra contadores generales de habitaciones, reservas y recursos.
+    Muestra contadores generales de habitaciones, reservas y recursos y, a los
+    administradores, indicadores de ocupación, ingresos y stock.
     """
-    num_habitaciones = Habitacion.objects.count()
-    num_reservas = Reserva.objects.count()
-    num_recursos = Recurso.objects.count()
-
-    context = {
-        "num_habitaciones": num_habitaciones,
-        "num_reservas": num_reservas,
-        "num_recursos": num_recursos,
-    }
+    context = dict(contadores())
+    if request.user.rol == "administrador":
+        context.update(indicadores())
 
-    return render(request, "gestion/index.html", context)
+    return TemplateResponse(request, "gestion/index.html", context)
 
 
-class HabitacionListView(LoginRequiredMixin, ListView):
+class HabitacionListView(
+    LecturaReplicaMixin,
+    FragmentoCacheMixin,
+    PaginacionCursorMixin,
+    LoginRequiredMixin,
+    GetCondicionalMixin,
+    ListView,
+):
     """
     Lista todas las habitaciones registradas.
     """
@@ -56,6 +89,88 @@ class HabitacionListView(LoginRequiredMixin, ListView):
     ordering = ["numero"]
 
 
+class HabitacionDisponibleView(LoginRequiredMixin, ListView):
+    """
+    Busca las habitaciones libres para un rango de fechas, capacidad y tipo.
+    Sin criterios válidos no muestra resultados.
+    """
+
+    template_name = "gestion/habitacion_disponible_list.html"
+
+    def get_queryset(self):
+        self.form = DisponibilidadForm(self.request.GET or None)
+        if self.form.is_valid():
+            return self.form.buscar()
+        return Habitacion.objects.none()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["form"] = self.form
+        return context
+
+
+@login_required
+def habitaciones_disponibles_api(request):
+    """
+    Versión JSON de la búsqueda de disponibilidad.
+    Recibe los mismos parámetros GET que HabitacionDisponibleView.
+    """
+    form = DisponibilidadForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"errores": form.errors}, status=400)
+    habitaciones = form.buscar().values("id", "numero", "tipo", "capacidad", "precio")
+    return JsonResponse({"habitaciones": list(habitaciones)})
+
+
+class OcupacionView(AdminRequiredMixin, TemplateView):
+    """
+    Calendario de ocupación: porcentaje de habitaciones ocupadas por noche y
+    detalle de las habitaciones ocupadas en una noche concreta (?fecha=).
+    Todo se lee del calendario materializado OcupacionNoche.
+    """
+
+    template_name = "gestion/ocupacion.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        form = CalendarioOcupacionForm(self.request.GET)
+        datos = form.cleaned_data if form.is_valid() else {}
+        desde = datos.get("desde") or date.today()
+        dias = datos.get("dias") or 30
+        hasta = desde + timedelta(days=dias)
+
+        total = Habitacion.objects.count()
+        ocupadas = dict(
+            OcupacionNoche.objects.filter(fecha__gte=desde, fecha__lt=hasta)
+            .values("fecha")
+            .annotate(ocupadas=Count("id"))
+            .values_list("fecha", "ocupadas")
+        )
+        noches = []
+        for i in range(dias):
+            fecha = desde + timedelta(days=i)
+            n = ocupadas.get(fecha, 0)
+            noches.append(
+                {
+                    "fecha": fecha,
+                    "ocupadas": n,
+                    "porcentaje": round(100 * n / total) if total else 0,
+                }
+            )
+
+        fecha_detalle = datos.get("fecha")
+        if fecha_detalle:
+            context["fecha_detalle"] = fecha_detalle
+            context["ocupadas_en_fecha"] = (
+                OcupacionNoche.objects.filter(fecha=fecha_detalle)
+                .select_related("habitacion", "reserva__usuario")
+                .order_by("habitacion__numero")
+            )
+
+        context.update({"form": form, "noches": noches, "total_habitaciones": total})
+        return context
+
+
 class HabitacionCreateView(AdminRequiredMixin, CreateView):
     """
     Permite registrar una nueva habitación.
@@ -80,7 +195,14 @@ class HabitacionDeleteView(AdminRequiredMixin, DeleteView):
     success_url = reverse_lazy("habitacion_list")
 
 
-class ReservaListView(LoginRequiredMixin, ListView):
+class ReservaListView(
+    LecturaReplicaMixin,
+    PaginacionCursorMixin,
+    ConsultaOptimizadaMixin,
+    LoginRequiredMixin,
+    GetCondicionalMixin,
+    ListView,
+):
     """
     Lista todas las reservas, ordenadas por fecha de inicio descendente.
     """
@@ -88,6 +210,16 @@ class ReservaListView(LoginRequiredMixin, ListView):
     model = Reserva
     template_name = "gestion/reserva_list.html"
     ordering = ["-fecha_inicio"]
+    select_related = ("usuario", "habitacion")
+    relaciones_etag = ("habitacion",)
+    only = (
+        "fecha_inicio",
+        "fecha_fin",
+        "estado",
+        "usuario__username",
+        "habitacion__numero",
+        "habitacion__tipo",
+    )
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -96,27 +228,96 @@ class ReservaListView(LoginRequiredMixin, ListView):
         return queryset
 
 
-class ReservaClienteCreateView(LoginRequiredMixin, CreateView):
+class ReservaClienteCreateView(LoginRequiredMixin, IdempotenciaMixin, CreateView):
     model = Reserva
     form_class = ReservaClienteForm
     template_name = "gestion/reserva_form.html"
     success_url = reverse_lazy("reserva_list")
 
+    @cached_property
+    def habitacion(self):
+        return get_object_or_404(Habitacion, pk=self.kwargs.get("habitacion_id"))
+
     def form_valid(self, form):
+        """
+        El formulario solo valida las fechas; el solapamiento se comprueba
+        una vez en guardar_reserva, con la habitación bloqueada.
+        """
         form.instance.usuario = self.request.user
-        habitacion_id = self.kwargs.get("habitacion_id")
-        form.instance.habitacion = get_object_or_404(Habitacion, pk=habitacion_id)
+        form.instance.habitacion = self.habitacion
         form.instance.estado = "pendiente"
-        return super().form_valid(form)
+        try:
+            self.object = guardar_reserva(form.instance)
+        except ValidationError as e:
+            form.add_error(None, e)
+            return self.form_invalid(form)
+        return redirect(self.get_success_url())
+
+    def get_initial(self):
+        # Permite llegar desde la búsqueda de disponibilidad con las fechas ya elegidas.
+        initial = super().get_initial()
+        for campo in ("fecha_inicio", "fecha_fin"):
+            if campo in self.request.GET:
+                initial[campo] = self.request.GET[campo]
+        return initial
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        habitacion_id = self.kwargs.get("habitacion_id")
-        context["habitacion"] = get_object_or_404(Habitacion, pk=habitacion_id)
+        context["habitacion"] = self.habitacion
         return context
 
 
-class RecursoListView(AdminRequiredMixin, ListView):
+class ReservaGrupoView(LoginRequiredMixin, IdempotenciaMixin, FormView):
+    """
+    Reserva de grupo: varias habitaciones para las mismas fechas, todas o
+    ninguna. Con las fechas en la URL (?fecha_inicio=&fecha_fin=, como llega
+    desde la búsqueda de disponibilidad) solo se ofrecen las habitaciones libres.
+    """
+
+    form_class = ReservaGrupoForm
+    template_name = "gestion/reserva_grupo_form.html"
+    success_url = reverse_lazy("reserva_list")
+
+    def get_initial(self):
+        initial = super().get_initial()
+        for campo in ("fecha_inicio", "fecha_fin"):
+            if campo in self.request.GET:
+                initial[campo] = self.request.GET[campo]
+        return initial
+
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        if self.request.method == "GET":
+            fechas = DisponibilidadForm(self.request.GET)
+            if fechas.is_valid():
+                campo = form.fields["habitaciones"]
+                campo.queryset = campo.queryset.filter(
+                    pk__in=fechas.buscar().values("pk")
+                )
+        return form
+
+    def form_valid(self, form):
+        datos = form.cleaned_data
+        try:
+            reservar_grupo(
+                self.request.user,
+                datos["habitaciones"],
+                datos["fecha_inicio"],
+                datos["fecha_fin"],
+            )
+        except ValidationError as e:
+            form.add_error(None, e)
+            return self.form_invalid(form)
+        return redirect(self.get_success_url())
+
+
+class RecursoListView(
+    LecturaReplicaMixin,
+    PaginacionCursorMixin,
+    AdminRequiredMixin,
+    GetCondicionalMixin,
+    ListView,
+):
     model = Recurso
     template_name = "gestion/recurso_list.html"
     ordering = ["nombre"]
@@ -142,7 +343,14 @@ class RecursoDeleteView(AdminRequiredMixin, DeleteView):
     success_url = reverse_lazy("recurso_list")
 
 
-class ClimaListView(LoginRequiredMixin, ListView):
+class ClimaListView(
+    LecturaReplicaMixin,
+    FragmentoCacheMixin,
+    PaginacionCursorMixin,
+    LoginRequiredMixin,
+    GetCondicionalMixin,
+    ListView,
+):
     model = Clima
     template_name = "gestion/clima_list.html"
     ordering = ["-fecha"]
@@ -168,13 +376,21 @@ class ClimaDeleteView(AdminRequiredMixin, DeleteView):
     success_url = reverse_lazy("clima_list")
 
 
-class MovimientoRecursoListView(AdminRequiredMixin, ListView):
+class MovimientoRecursoListView(
+    LecturaReplicaMixin,
+    PaginacionCursorMixin,
+    ConsultaOptimizadaMixin,
+    AdminRequiredMixin,
+    ListView,
+):
     model = MovimientoRecurso
     template_name = "gestion/movimiento_recurso_list.html"
     ordering = ["-fecha"]
+    select_related = ("recurso",)
+    only = ("cantidad", "fecha", "motivo", "recurso__nombre")
 
 
-class MovimientoRecursoCreateView(AdminRequiredMixin, CreateView):
+class MovimientoRecursoCreateView(AdminRequiredMixin, IdempotenciaMixin, CreateView):
     model = MovimientoRecurso
     form_class = MovimientoRecursoForm
     template_name = "gestion/movimiento_recurso_form.html"
@@ -188,6 +404,118 @@ class MovimientoRecursoUpdateView(AdminRequiredMixin, UpdateView):
     success_url = reverse_lazy("movimiento_recurso_list")
 
 
+class MovimientoRecursoLoteView(AdminRequiredMixin, IdempotenciaMixin, View):
+    """
+    Carga masiva de movimientos. Recibe el cuerpo de la petición como CSV
+    (Content-Type: text/csv, con encabezado recurso,cantidad,motivo) o JSONL
+    (application/x-ndjson) y lo procesa en streaming. Es todo o nada.
+    Con el encabezado Idempotency-Key, reenviar la misma carga devuelve la
+    respuesta original sin volver a registrar los movimientos.
+    """
+
+    FORMATOS = {
+        "text/csv": "csv",
+        "application/x-ndjson": "jsonl",
+        "application/jsonl": "jsonl",
+    }
+
+    def post(self, request):
+        formato = self.FORMATOS.get(request.content_type)
+        if formato is None:
+            return JsonResponse(
+                {"errores": ["Content-Type debe ser text/csv o application/x-ndjson."]},
+                status=415,
+            )
+        lineas = (linea.decode("utf-8") for linea in request)
+        try:
+            creados = registrar_movimientos(leer_filas(lineas, formato))
+        except LoteInvalido as e:
+            return JsonResponse(
+                {"errores": [{"fila": n, "error": msg} for n, msg in e.errores]},
+                status=400,
+            )
+        return JsonResponse({"creados": creados}, status=201)
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve cada línea en vez de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def _con_encabezado(campos, filas):
+    yield campos
+    yield from filas
+
+
+class ExportarView(LecturaReplicaMixin, AdminRequiredMixin, View):
+    """
+    Exportación completa de un modelo en CSV o JSONL (?formato=jsonl).
+    Las filas se leen con un cursor del servidor (.iterator) como tuplas de
+    values_list y se envían a medida que llegan, así que la memoria no crece
+    con el tamaño de la tabla. La base de datos se elige antes de responder
+    porque la lectura sigue después de que termina la petición.
+    """
+
+    queryset = None
+    campos = ()
+    nombre_archivo = None
+    chunk_size = 2000
+
+    def get(self, request):
+        formato = request.GET.get("formato", "csv")
+        queryset = self.queryset.using(router.db_for_read(self.queryset.model))
+        filas = queryset.values_list(*self.campos).iterator(
+            chunk_size=self.chunk_size
+        )
+        if formato == "jsonl":
+            contenido = (
+                json.dumps(dict(zip(self.campos, fila)), cls=DjangoJSONEncoder) + "\n"
+                for fila in filas
+            )
+            tipo = "application/x-ndjson"
+        else:
+            formato = "csv"
+            escritor = csv.writer(_Eco())
+            contenido = (
+                escritor.writerow(fila)
+                for fila in _con_encabezado(self.campos, filas)
+            )
+            tipo = "text/csv"
+
+        response = StreamingHttpResponse(contenido, content_type=tipo)
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self.nombre_archivo}.{formato}"'
+        )
+        return response
+
+
+class ReservaExportView(ExportarView):
+    queryset = Reserva.objects.order_by("pk")
+    campos = (
+        "id",
+        "usuario__username",
+        "habitacion__numero",
+        "fecha_inicio",
+        "fecha_fin",
+        "estado",
+    )
+    nombre_archivo = "reservas"
+
+
+class MovimientoRecursoExportView(ExportarView):
+    queryset = MovimientoRecurso.objects.order_by("pk")
+    campos = ("id", "recurso__nombre", "fecha", "cantidad", "motivo")
+    nombre_archivo = "movimientos"
+
+
+class ClimaExportView(ExportarView):
+    queryset = Clima.objects.order_by("fecha")
+    campos = ("fecha", "temperatura", "probabilidad_lluvia", "comentarios")
+    nombre_archivo = "clima"
+
+
 class RegistroView(CreateView):
     """
     Vista para el registro de nuevos usuarios.
@@ -1,13 +1,21 @@
 import os
+import argparse
 import django
 import random
+import time
 from datetime import date, timedelta
+from multiprocessing import Pool
 from faker import Faker
 
 # Configurar el entorno de Django
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "albergue_project.settings")
 django.setup()
 
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.db import connections, transaction  # noqa: E402
+from gestion.dashboard import invalidar_contadores  # noqa: E402
+from gestion.fragmentos import incrementar_version  # noqa: E402
+from gestion.services import reservar, vaciar_tablas  # noqa: E402
 from gestion.models import (  # noqa: E402
     Usuario,
     Habitacion,
@@ -16,18 +24,39 @@ from gestion.models import (  # noqa: E402
     Clima,
     MovimientoRecurso,
     Contacto,
+    OcupacionNoche,
 )
 
 fake = Faker("es_ES")
 
 
-def clean_database():
+def clean_database(rapido=False):
     """
     Elimina todos los registros de la base de datos en orden correcto
     para evitar conflictos de claves foráneas.
+    Con rapido=True vacía las tablas con TRUNCATE (o su equivalente), sin
+    cargar las filas en memoria ni enviar señales.
     """
     print("Limpiando base de datos...")
 
+    if rapido:
+        # Los usuarios se conservan igual que en el modo normal.
+        vaciar_tablas(
+            [
+                OcupacionNoche,
+                MovimientoRecurso,
+                Reserva,
+                Recurso,
+                Habitacion,
+                Clima,
+                Contacto,
+            ]
+        )
+        invalidar_contadores()
+        incrementar_version()
+        print("Base de datos limpia (excepto usuarios).")
+        return
+
     # Eliminar primero los modelos que tienen claves foráneas (Hijos)
     print("- Eliminando Movimientos de Recursos...")
     MovimientoRecurso.objects.all().delete()
@@ -54,11 +83,11 @@ def clean_database():
     print("Base de datos limpia (excepto usuarios).")
 
 
-def populate():
+def populate(rapido=False):
     """
     Script para poblar la base de datos con datos de prueba usando Faker.
     """
-    clean_database()
+    clean_database(rapido)
     print("Iniciando script de población de datos con Faker...")
 
     # --- USUARIOS ---
@@ -155,11 +184,11 @@ def populate():
 
             # Intentar crear reserva (puede fallar por validación de solapamiento, lo manejamos)
             try:
-                Reserva.objects.create(
-                    usuario=usuario,
-                    habitacion=habitacion,
-                    fecha_inicio=start_date,
-                    fecha_fin=end_date,
+                reservar(
+                    usuario,
+                    habitacion,
+                    start_date,
+                    end_date,
                     estado=random.choice(["pendiente", "confirmada", "cancelada"]),
                 )
             except Exception:
@@ -251,5 +280,217 @@ def populate():
     print("¡Población de datos con Faker completada con éxito!")
 
 
+# ================ MODO GENERADOR (PRUEBAS DE CARGA) ================
+
+# Fecha fija para que la misma semilla produzca siempre los mismos datos.
+FECHA_BASE = date(2024, 1, 1)
+ESTADOS_RESERVA = ["pendiente", "confirmada", "cancelada"]
+PESOS_ESTADO = [20, 65, 15]
+
+
+def generar_usuarios(cantidad, semilla, lote):
+    """
+    Crea `cantidad` clientes con bulk_create. Todos comparten la misma
+    contraseña ya hasheada: hashear 200.000 veces llevaría horas.
+    Devuelve la lista ordenada de pks de los clientes generados.
+    """
+    rng = random.Random(semilla)
+    fake_local = Faker("es_ES")
+    fake_local.seed_instance(semilla)
+    nombres = [fake_local.first_name() for _ in range(300)]
+    apellidos = [fake_local.last_name() for _ in range(300)]
+    password = make_password("password123")
+
+    for inicio in range(0, cantidad, lote):
+        Usuario.objects.bulk_create(
+            [
+                Usuario(
+                    username=f"carga_{i}",
+                    email=f"carga_{i}@example.com",
+                    password=password,
+                    rol="cliente",
+                    nombre=rng.choice(nombres),
+                    apellido=rng.choice(apellidos),
+                )
+                for i in range(inicio, min(inicio + lote, cantidad))
+            ],
+            ignore_conflicts=True,
+        )
+    return list(
+        Usuario.objects.filter(username__startswith="carga_")
+        .order_by("pk")
+        .values_list("pk", flat=True)[:cantidad]
+    )
+
+
+def generar_habitaciones(cantidad, semilla, lote):
+    """Crea `cantidad` habitaciones y devuelve sus pks ordenadas."""
+    rng = random.Random(semilla)
+    precios = {"individual": 50, "doble": 80, "suite": 150}
+    capacidades = {"individual": 1, "doble": 2, "suite": 4}
+    habitaciones = []
+    for i in range(cantidad):
+        tipo = rng.choice(list(precios))
+        habitaciones.append(
+            Habitacion(
+                numero=f"G{i:05d}",
+                tipo=tipo,
+                capacidad=capacidades[tipo],
+                precio=precios[tipo],
+                estado="mantenimiento" if rng.random() < 0.05 else "disponible",
+            )
+        )
+    Habitacion.objects.bulk_create(habitaciones, batch_size=lote)
+    return list(
+        Habitacion.objects.filter(numero__startswith="G")
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def _guardar_reservas(reservas, lote):
+    """Inserta un lote de reservas y sus noches en el calendario de ocupación."""
+    with transaction.atomic():
+        Reserva.objects.bulk_create(reservas, batch_size=lote)
+        noches = []
+        for reserva in reservas:
+            if reserva.estado in Reserva.ESTADOS_ACTIVOS:
+                noches.extend(OcupacionNoche.noches_de(reserva))
+        OcupacionNoche.objects.bulk_create(noches, batch_size=lote)
+
+
+def generar_reservas_habitaciones(tarea):
+    """
+    Genera las reservas de un grupo de habitaciones. Cada habitación tiene su
+    propia línea de tiempo: la siguiente reserva empieza cuando termina la
+    anterior (más un hueco aleatorio), así que nunca se solapan y no hace
+    falta consultar la base de datos. El generador de cada habitación se
+    siembra con su índice, de modo que el resultado no depende de cuántos
+    procesos se usen.
+    """
+    habitaciones, usuario_ids, semilla, lote = tarea
+    creadas = 0
+    pendientes = []
+    for indice, habitacion_id, cantidad in habitaciones:
+        rng = random.Random(semilla * 1_000_003 + indice)
+        fecha = FECHA_BASE + timedelta(days=rng.randint(0, 30))
+        for _ in range(cantidad):
+            fecha += timedelta(days=rng.randint(0, 3))
+            noches = rng.randint(1, 7)
+            pendientes.append(
+                Reserva(
+                    usuario_id=usuario_ids[rng.randrange(len(usuario_ids))],
+                    habitacion_id=habitacion_id,
+                    fecha_inicio=fecha,
+                    fecha_fin=fecha + timedelta(days=noches),
+                    estado=rng.choices(ESTADOS_RESERVA, PESOS_ESTADO)[0],
+                )
+            )
+            fecha += timedelta(days=noches)
+            if len(pendientes) >= lote:
+                _guardar_reservas(pendientes, lote)
+                creadas += len(pendientes)
+                pendientes = []
+    if pendientes:
+        _guardar_reservas(pendientes, lote)
+        creadas += len(pendientes)
+    connections.close_all()
+    return creadas
+
+
+def generar_carga(
+    habitaciones, usuarios, reservas, procesos=1, semilla=42, lote=5000, rapido=False
+):
+    """
+    Genera un conjunto de datos de tamaño producción para pruebas de carga.
+    Todo se escribe con bulk_create por lotes; las reservas se reparten en
+    partes iguales entre las habitaciones y, opcionalmente, entre varios
+    procesos (no recomendable con SQLite, que serializa las escrituras).
+    """
+    clean_database(rapido)
+    inicio = time.perf_counter()
+
+    print(f"Generando {usuarios} usuarios...")
+    usuario_ids = generar_usuarios(usuarios, semilla, lote)
+
+    print(f"Generando {habitaciones} habitaciones...")
+    habitacion_ids = generar_habitaciones(habitaciones, semilla, lote)
+
+    if reservas and not (usuario_ids and habitacion_ids):
+        raise SystemExit("Se necesitan usuarios y habitaciones para generar reservas.")
+
+    print(f"Generando {reservas} reservas con {procesos} proceso(s)...")
+    base, resto = divmod(reservas, len(habitacion_ids))
+    plan = [
+        (indice, pk, base + (1 if indice < resto else 0))
+        for indice, pk in enumerate(habitacion_ids)
+    ]
+    tareas = [(plan[i::procesos], usuario_ids, semilla, lote) for i in range(procesos)]
+    if procesos > 1:
+        # Los procesos hijos abren sus propias conexiones.
+        connections.close_all()
+        with Pool(procesos) as pool:
+            creadas = sum(pool.map(generar_reservas_habitaciones, tareas))
+    else:
+        creadas = generar_reservas_habitaciones(tareas[0])
+
+    invalidar_contadores()
+    incrementar_version()
+    print(
+        f"¡Generación completada! {creadas} reservas en "
+        f"{time.perf_counter() - inicio:.1f} s."
+    )
+
+
+def cantidad(valor):
+    """Convierte '2M' o '500k' en un entero."""
+    multiplicadores = {"k": 1_000, "m": 1_000_000}
+    sufijo = valor[-1:].lower()
+    if sufijo in multiplicadores:
+        return int(float(valor[:-1]) * multiplicadores[sufijo])
+    return int(valor)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Puebla la base de datos. Sin opciones genera un conjunto pequeño "
+            "de demostración; con --rooms/--users/--reservations genera datos "
+            "masivos para pruebas de carga."
+        )
+    )
+    parser.add_argument("--rooms", type=cantidad, help="Habitaciones a generar.")
+    parser.add_argument(
+        "--users", type=cantidad, default=1000, help="Clientes a generar."
+    )
+    parser.add_argument(
+        "--reservations",
+        type=cantidad,
+        default=0,
+        help="Reservas a generar (admite sufijos k y M, ej. 2M).",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Procesos en paralelo.")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla aleatoria.")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Filas por lote.")
+    parser.add_argument(
+        "--truncate",
+        action="store_true",
+        help="Limpia las tablas con TRUNCATE en lugar de borrar fila por fila.",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    populate()
+    args = parse_args()
+    if args.rooms:
+        generar_carga(
+            habitaciones=args.rooms,
+            usuarios=args.users,
+            reservas=args.reservations,
+            procesos=args.workers,
+            semilla=args.seed,
+            lote=args.batch_size,
+            rapido=args.truncate,
+        )
+    else:
+        populate(rapido=args.truncate)
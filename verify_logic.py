@@ -1,7 +1,13 @@
 import os
+import sys
+import threading
 import django
 from datetime import date, timedelta
 from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import reverse
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "albergue_project.settings")
 django.setup()
@@ -10,7 +16,9 @@ django.setup()
 def verify():
     """
     Script de verificación de lógica de negocio.
-    Prueba la validación de reservas superpuestas y la actualización automática de stock.
+    Prueba la validación de reservas superpuestas (también con reservas concurrentes),
+    la actualización automática de stock (también con escrituras concurrentes) y que
+    los listados no hagan una consulta por fila.
     """
     print("--- Verificando Lógica de Negocio ---")
     from gestion.models import Reserva, Habitacion, Usuario, Recurso, MovimientoRecurso
@@ -68,6 +76,312 @@ def verify():
     else:
         print("ERROR: El stock no se actualizó correctamente.")
 
+    # Las pruebas 3 y 6 hacen peticiones con el cliente de pruebas.
+    setup_test_environment()
+
+    print("\n3. Prueba de Consultas en Listados:")
+    fallos = verificar_consultas_listados()
+
+    print("\n4. Prueba de Stock con Escrituras Concurrentes:")
+    fallos += verificar_concurrencia_stock()
+
+    print("\n5. Prueba de Reservas Concurrentes de una Habitación:")
+    fallos += verificar_concurrencia_reservas()
+
+    print("\n6. Prueba de Cursores de Paginación Inválidos:")
+    fallos += verificar_cursores_invalidos()
+    return fallos
+
+
+def verificar_concurrencia_reservas(hilos=8):
+    """
+    Varios hilos reservan a la vez la misma habitación en las mismas fechas
+    con services.reservar. Solo una reserva debe quedar; el resto debe
+    fallar con ValidationError.
+    """
+    from gestion.models import Habitacion, Reserva, Usuario
+    from gestion.services import reservar
+
+    if connection.vendor == "sqlite":
+        print("OMITIDO: SQLite serializa las escrituras; ejecutar contra PostgreSQL.")
+        return 0
+
+    usuario = Usuario.objects.first()
+    habitacion = Habitacion.objects.create(
+        numero="CONC-1", tipo="doble", capacidad=2, precio=1
+    )
+    inicio = date.today() + timedelta(days=30)
+    barrera = threading.Barrier(hilos)
+    exitos, rechazos, errores = [], [], []
+
+    def trabajador():
+        try:
+            barrera.wait()
+            exitos.append(reservar(usuario, habitacion.pk, inicio, inicio + timedelta(days=3)))
+        except ValidationError:
+            rechazos.append(1)
+        except Exception as e:
+            errores.append(e)
+        finally:
+            connection.close()
+
+    trabajadores = [threading.Thread(target=trabajador) for _ in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+
+    guardadas = Reserva.objects.filter(habitacion=habitacion).count()
+    habitacion.delete()
+
+    if errores:
+        print(f"ERROR: {len(errores)} hilos fallaron. Primer error: {errores[0]}")
+        return 1
+    if len(exitos) != 1 or guardadas != 1:
+        print(f"ERROR: {len(exitos)} reservas aceptadas y {guardadas} guardadas; se esperaba 1.")
+        return 1
+    print(f"ÉXITO: 1 reserva aceptada y {len(rechazos)} rechazadas por solapamiento.")
+    return 0
+
+
+def verificar_concurrencia_stock(hilos=8, movimientos_por_hilo=25):
+    """
+    Varios hilos registran movimientos sobre el mismo recurso a la vez.
+    Si algún incremento se pierde, el stock final no cuadra.
+    """
+    from gestion.models import Recurso, MovimientoRecurso
+
+    if connection.vendor == "sqlite":
+        print("OMITIDO: SQLite serializa las escrituras; ejecutar contra PostgreSQL.")
+        return 0
+
+    recurso = Recurso.objects.create(
+        nombre="Prueba de concurrencia", tipo="consumible", cantidad_total=0, unidad="u"
+    )
+    barrera = threading.Barrier(hilos)
+    errores = []
+
+    def trabajador():
+        try:
+            barrera.wait()
+            for _ in range(movimientos_por_hilo):
+                MovimientoRecurso.objects.create(
+                    recurso_id=recurso.pk, cantidad=1, motivo="Prueba de concurrencia"
+                )
+        except Exception as e:
+            errores.append(e)
+        finally:
+            connection.close()
+
+    trabajadores = [threading.Thread(target=trabajador) for _ in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+
+    recurso.refresh_from_db()
+    esperado = hilos * movimientos_por_hilo
+    recurso.delete()
+
+    if errores:
+        print(f"ERROR: {len(errores)} hilos fallaron. Primer error: {errores[0]}")
+        return 1
+    if recurso.cantidad_total != esperado:
+        print(f"ERROR: stock final {recurso.cantidad_total}, se esperaba {esperado}.")
+        return 1
+    print(f"ÉXITO: {esperado} movimientos concurrentes, stock final {recurso.cantidad_total}.")
+    return 0
+
+
+def contar_consultas(cliente, url):
+    with CaptureQueriesContext(connection) as consultas:
+        respuesta = cliente.get(url)
+    assert respuesta.status_code == 200, f"{url} respondió {respuesta.status_code}"
+    return len(consultas)
+
+
+def verificar_consultas_listados(filas_extra=50):
+    """
+    Renderiza cada listado que carga relaciones o se pagina con una sola
+    fila y luego con una página completa (filas_extra filas más): la cantidad
+    de consultas no debe cambiar. Los listados se vacían primero para que la
+    segunda página muestre de verdad las filas nuevas. El administrador y
+    los datos se crean aquí y todo se revierte al final.
+    """
+    from itertools import count
+
+    from gestion.fragmentos import incrementar_version
+    from gestion.mixins import PaginacionCursorMixin
+    from gestion.models import (
+        Usuario,
+        Habitacion,
+        Reserva,
+        Recurso,
+        MovimientoRecurso,
+        Clima,
+        OcupacionNoche,
+    )
+
+    numeros = count()
+    noche = date(1990, 1, 1)
+
+    def habitaciones(cantidad):
+        return Habitacion.objects.bulk_create(
+            Habitacion(numero=f"V{next(numeros)}", tipo="individual", capacidad=1, precio=0)
+            for _ in range(cantidad)
+        )
+
+    def reservas(cantidad):
+        Reserva.objects.bulk_create(
+            Reserva(
+                usuario=admin,
+                habitacion=habitacion,
+                fecha_inicio=noche + timedelta(days=next(numeros)),
+                fecha_fin=noche + timedelta(days=next(numeros) + 1),
+                estado="cancelada",
+            )
+            for _ in range(cantidad)
+        )
+
+    def ocupacion(cantidad):
+        # Una habitación ocupada más por fila en la noche del detalle.
+        nuevas = Reserva.objects.bulk_create(
+            Reserva(
+                usuario=admin,
+                habitacion=libre,
+                fecha_inicio=noche,
+                fecha_fin=noche + timedelta(days=1),
+                estado="confirmada",
+            )
+            for libre in habitaciones(cantidad)
+        )
+        OcupacionNoche.objects.bulk_create(
+            OcupacionNoche(habitacion_id=r.habitacion_id, fecha=noche, reserva=r)
+            for r in nuevas
+        )
+
+    def movimientos(cantidad):
+        MovimientoRecurso.objects.bulk_create(
+            MovimientoRecurso(recurso=recurso, cantidad=0, motivo="Verificación")
+            for _ in range(cantidad)
+        )
+
+    def recursos(cantidad):
+        Recurso.objects.bulk_create(
+            Recurso(
+                nombre=f"Verificación {next(numeros)}",
+                tipo="consumible",
+                cantidad_total=0,
+                unidad="u",
+            )
+            for _ in range(cantidad)
+        )
+
+    def climas(cantidad):
+        Clima.objects.bulk_create(
+            Clima(
+                fecha=noche + timedelta(days=next(numeros)),
+                temperatura=20,
+                probabilidad_lluvia=0,
+            )
+            for _ in range(cantidad)
+        )
+
+    # (url, modelo que se vacía, función que agrega filas). Vaciar
+    # Habitacion y Recurso borra los datos de los demás: van al final.
+    listados = [
+        (reverse("reserva_list"), Reserva, reservas),
+        (f"{reverse('ocupacion')}?fecha={noche.isoformat()}", OcupacionNoche, ocupacion),
+        (reverse("movimiento_recurso_list"), MovimientoRecurso, movimientos),
+        (reverse("recurso_list"), Recurso, recursos),
+        (reverse("clima_list"), Clima, climas),
+        (reverse("habitacion_list"), Habitacion, habitaciones),
+    ]
+    filas_extra = max(filas_extra, PaginacionCursorMixin.tamano_pagina)
+
+    cliente = Client()
+    fallos = 0
+    with transaction.atomic():
+        admin = Usuario.objects.create_user(
+            username="verificacion_listados", password=None, rol="administrador"
+        )
+        cliente.force_login(admin)
+        (habitacion,) = habitaciones(1)
+        recurso = Recurso.objects.create(
+            nombre="Verificación", tipo="consumible", cantidad_total=0, unidad="u"
+        )
+
+        def medir(url):
+            # bulk_create no cambia la versión de los fragmentos cacheados.
+            incrementar_version()
+            return contar_consultas(cliente, url)
+
+        for url, modelo, agregar_filas in listados:
+            modelo.objects.all().delete()
+            agregar_filas(1)
+            contar_consultas(cliente, url)  # Calienta sesión y cachés ajenas al listado.
+            antes = medir(url)
+            agregar_filas(filas_extra)
+            despues = medir(url)
+            if antes == despues:
+                print(f"ÉXITO: {url} hace {antes} consultas con 1 fila y con una página completa.")
+            else:
+                fallos += 1
+                print(f"ERROR: {url} pasó de {antes} a {despues} consultas.")
+        transaction.set_rollback(True)
+
+    # Los fragmentos renderizados con los datos revertidos no deben servirse.
+    incrementar_version()
+    return fallos
+
+
+def verificar_cursores_invalidos():
+    """
+    Un cursor manipulado (JSON que no es [valor, pk], valor nulo, base64
+    roto) debe mostrar la primera página, nunca un error 500.
+    """
+    import base64
+    import json
+
+    from gestion.models import Usuario
+
+    cursores = [
+        base64.urlsafe_b64encode(json.dumps(datos).encode()).decode().rstrip("=")
+        for datos in (["x", None], {"a": 1, "b": 2}, [1, 2, 3], "texto")
+    ] + ["%%%", "W251bGwsIDFd"]  # El último es [null, 1].
+    urls = [
+        reverse(nombre)
+        for nombre in (
+            "reserva_list",
+            "habitacion_list",
+            "clima_list",
+            "recurso_list",
+            "movimiento_recurso_list",
+            "api_reservas",
+            "api_clima",
+        )
+    ]
+
+    cliente = Client(raise_request_exception=False)
+    fallos = 0
+    with transaction.atomic():
+        admin = Usuario.objects.create_user(
+            username="verificacion_cursores", password=None, rol="administrador"
+        )
+        cliente.force_login(admin)
+        for url in urls:
+            for cursor in cursores:
+                for direccion in ("despues", "antes"):
+                    respuesta = cliente.get(url, {direccion: cursor})
+                    if respuesta.status_code != 200:
+                        fallos += 1
+                        print(f"ERROR: {url}?{direccion}={cursor} respondió {respuesta.status_code}.")
+        transaction.set_rollback(True)
+    if not fallos:
+        print(f"ÉXITO: {len(urls)} listados responden 200 con {len(cursores)} cursores inválidos.")
+    return fallos
+
 
 if __name__ == "__main__":
-    verify()
+    # Sale con código 1 si falla alguna de las pruebas 3 a 6.
+    sys.exit(1 if verify() else 0)